@@ -7,7 +7,9 @@ from app.pages.admin import admin_page
 from app.pages.info import info_page
 from app.states.auth_state import AuthState
 from app.states.state import BarberState
+from app.states.booking_state import BookingState
 from app.states.db_service import init_db
+from app.states.maintenance import maintenance_task
 
 init_db()
 
@@ -40,7 +42,7 @@ def index() -> rx.Component:
             ),
             # Add padding to prevent overlap with the fixed navbar
             class_name="min-h-screen bg-gray-50 font-['Inter'] pb-24 md:pt-20 md:pb-8",
-            on_mount=BarberState.load_data,
+            on_mount=BookingState.load_data,
         ),
     )
 
@@ -63,6 +65,7 @@ app = rx.App(
         ),
     ],
 )
+app.register_lifespan_task(maintenance_task)
 app.add_page(index, route="/", title="Chentes Barber")
 app.add_page(
     login_page, route="/login", title="Admin Login"
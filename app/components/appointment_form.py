@@ -1,5 +1,5 @@
 import reflex as rx
-from app.states.state import BarberState
+from app.states.booking_state import BookingState
 from app.components.scheduler import scheduler
 
 
@@ -36,7 +36,7 @@ def _service_selection_field() -> rx.Component:
         ),
         rx.el.div(
             rx.foreach(
-                BarberState.services,
+                BookingState.services,
                 lambda service: rx.el.button(
                     rx.el.div(
                         rx.el.p(
@@ -49,11 +49,11 @@ def _service_selection_field() -> rx.Component:
                         ),
                         class_name="flex flex-col items-center",
                     ),
-                    on_click=lambda: BarberState.toggle_service(
+                    on_click=lambda: BookingState.toggle_service(
                         service["name"]
                     ),
                     class_name=rx.cond(
-                        BarberState.selected_services.contains(
+                        BookingState.selected_services.contains(
                             service["name"]
                         ),
                         "w-full p-4 rounded-lg text-center transition-all bg-blue-600 text-white border-blue-700 shadow-md",
@@ -70,7 +70,7 @@ def _service_selection_field() -> rx.Component:
 
 def confirmation_dialog() -> rx.Component:
     return rx.cond(
-        BarberState.show_confirm_dialog,
+        BookingState.show_confirm_dialog,
         rx.el.div(
             rx.el.div(
                 rx.el.div(
@@ -96,7 +96,7 @@ def confirmation_dialog() -> rx.Component:
                             class_name="flex items-center gap-2 p-3 bg-blue-50 rounded-lg",
                         ),
                         rx.el.p(
-                            BarberState.pending_booking_code,
+                            BookingState.pending_booking_code,
                             class_name="text-4xl font-bold tracking-widest text-center text-blue-600 my-4 p-3 bg-gray-100 rounded-lg",
                         ),
                         class_name="mb-2",
@@ -107,36 +107,28 @@ def confirmation_dialog() -> rx.Component:
                                 "Nombre: ",
                                 class_name="font-semibold",
                             ),
-                            BarberState.pending_appointment_data.get(
-                                "name", ""
-                            ),
-                            " ",
-                            BarberState.pending_appointment_data.get(
-                                "last_name", ""
-                            ),
+                            BookingState.pending_customer,
                         ),
                         rx.el.p(
                             rx.el.span(
                                 "Teléfono: ",
                                 class_name="font-semibold",
                             ),
-                            BarberState.pending_appointment_data.get(
-                                "phone", ""
-                            ),
+                            BookingState.pending_phone,
                         ),
                         rx.el.p(
                             rx.el.span(
                                 "Barbero: ",
                                 class_name="font-semibold",
                             ),
-                            BarberState.selected_barber,
+                            BookingState.selected_barber,
                         ),
                         rx.el.p(
                             rx.el.span(
                                 "Fecha: ",
                                 class_name="font-semibold",
                             ),
-                            BarberState.selected_date,
+                            BookingState.selected_date,
                         ),
                         rx.el.p(
                             rx.el.span(
@@ -144,7 +136,7 @@ def confirmation_dialog() -> rx.Component:
                                 class_name="font-semibold",
                             ),
                             rx.moment(
-                                BarberState.selected_time,
+                                BookingState.selected_time,
                                 format="hh:mm A",
                                 parse="HH:mm",
                             ),
@@ -158,7 +150,7 @@ def confirmation_dialog() -> rx.Component:
                             class_name="font-semibold text-gray-800 mb-2",
                         ),
                         rx.foreach(
-                            BarberState.selected_services_details,
+                            BookingState.selected_services_details,
                             lambda service: rx.el.div(
                                 rx.el.p(service["name"]),
                                 rx.el.p(f"${service['price']}"),
@@ -171,7 +163,7 @@ def confirmation_dialog() -> rx.Component:
                         rx.el.div(
                             rx.el.p("Total a Pagar", class_name="font-bold"),
                             rx.el.p(
-                                f"${BarberState.total_price}",
+                                f"${BookingState.total_price}",
                                 class_name="font-bold",
                             ),
                             class_name="flex justify-between text-base text-gray-900 mt-2",
@@ -181,13 +173,13 @@ def confirmation_dialog() -> rx.Component:
                     rx.el.div(
                         rx.el.button(
                             "Confirmar Cita",
-                            on_click=BarberState.confirm_appointment,
+                            on_click=BookingState.confirm_appointment,
                             class_name="w-full sm:w-auto px-6 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 font-medium transition-all duration-300 transform hover:-translate-y-1",
                             type="button",
                         ),
                         rx.el.button(
                             "Cancelar",
-                            on_click=BarberState.cancel_confirmation,
+                            on_click=BookingState.cancel_confirmation,
                             class_name="w-full sm:w-auto px-6 py-2 bg-gray-200 text-gray-800 rounded-lg hover:bg-gray-300 font-medium transition-all duration-300 transform hover:-translate-y-1",
                             type="button",
                         ),
@@ -198,7 +190,7 @@ def confirmation_dialog() -> rx.Component:
                 class_name="fixed inset-0 z-50 flex items-center justify-center p-1",
             ),
             rx.el.div(
-                on_click=BarberState.cancel_confirmation,
+                on_click=BookingState.cancel_confirmation,
                 class_name="fixed inset-0 z-40 bg-black/60 backdrop-blur-sm transition-opacity duration-300",
             ),
         ),
@@ -216,7 +208,7 @@ def appointment_form() -> rx.Component:
             rx.el.div(
                 scheduler(),
                 rx.cond(
-                    BarberState.selected_time != "",
+                    BookingState.selected_time != "",
                     rx.el.div(
                         rx.el.div(
                             class_name="w-full border-t border-gray-200 my-6"
@@ -249,7 +241,7 @@ def appointment_form() -> rx.Component:
                 ),
                 class_name="flex flex-col items-center gap-4",
             ),
-            on_submit=BarberState.prepare_appointment,
+            on_submit=BookingState.prepare_appointment,
             reset_on_submit=False,
             class_name="w-full",
         ),
@@ -1,10 +1,10 @@
 import reflex as rx
-from app.states.state import BarberState, Appointment
+from app.states.state import BarberState, AppointmentCard
 from app.states.auth_state import AuthState
 
 
 def _appointment_card(
-    appointment: Appointment,
+    appointment: AppointmentCard,
 ) -> rx.Component:
     return rx.el.div(
         rx.el.div(
@@ -15,7 +15,7 @@ def _appointment_card(
                         class_name="w-5 h-5 text-blue-500",
                     ),
                     rx.el.p(
-                        f"{appointment['name']} {appointment['last_name']}",
+                        appointment["customer"],
                         class_name="font-semibold text-lg text-gray-800",
                     ),
                     class_name="flex items-center gap-3",
@@ -60,7 +60,7 @@ def _appointment_card(
                         class_name="w-4 h-4 text-gray-500",
                     ),
                     rx.el.p(
-                        appointment["services"].join(", "),
+                        appointment["services"],
                         class_name="text-sm text-gray-600",
                     ),
                     class_name="flex items-center gap-2",
@@ -101,12 +101,20 @@ def appointment_list() -> rx.Component:
             class_name="text-2xl font-bold text-gray-800 mb-6 text-center",
         ),
         rx.cond(
-            BarberState.filtered_appointments.length() > 0,
+            BarberState.appointment_cards.length() > 0,
             rx.el.div(
                 rx.foreach(
-                    BarberState.filtered_appointments,
+                    BarberState.appointment_cards,
                     _appointment_card,
                 ),
+                rx.cond(
+                    BarberState.has_more_appointments,
+                    rx.el.button(
+                        "Cargar más",
+                        on_click=BarberState.load_more_appointments,
+                        class_name="w-full py-3 bg-gray-100 text-gray-800 rounded-lg font-medium hover:bg-gray-200 transition-colors",
+                    ),
+                ),
                 class_name="flex flex-col gap-6",
             ),
             rx.el.div(
@@ -1,5 +1,5 @@
 import reflex as rx
-from app.states.state import BarberState
+from app.states.booking_state import BookingState
 
 
 def _nav_item(icon: str, href: str = "", on_click=None) -> rx.Component:
@@ -32,7 +32,7 @@ def navbar() -> rx.Component:
         # This is the visible navbar element.
         rx.el.div(
             _nav_item(icon="calendar-days", href="/"),
-            _nav_item(icon="search", on_click=BarberState.toggle_search_dialog),
+            _nav_item(icon="search", on_click=BookingState.toggle_search_dialog),
             _nav_item(icon="info", href="/info"),
             # Styling for the bar itself: width, centering, background, etc.
             class_name=(
@@ -1,22 +1,22 @@
 import reflex as rx
-from app.states.state import BarberState
+from app.states.booking_state import BookingState, WEEK_DAYS
 
 
 def _calendar_header() -> rx.Component:
     return rx.el.div(
         rx.el.button(
             rx.icon("chevron-left"),
-            on_click=lambda: BarberState.change_month(-1),
+            on_click=lambda: BookingState.change_month(-1),
             class_name="p-2 rounded-md hover:bg-gray-100",
             type="button",
         ),
         rx.el.h3(
-            BarberState.display_month_str,
+            BookingState.display_month_str,
             class_name="font-semibold text-lg w-32 text-center",
         ),
         rx.el.button(
             rx.icon("chevron-right"),
-            on_click=lambda: BarberState.change_month(1),
+            on_click=lambda: BookingState.change_month(1),
             class_name="p-2 rounded-md hover:bg-gray-100",
             type="button",
         ),
@@ -29,7 +29,7 @@ def _day_component(day_data: dict) -> rx.Component:
         day_data["is_in_month"],
         rx.el.button(
             day_data["day"],
-            on_click=lambda: BarberState.select_date(
+            on_click=lambda: BookingState.select_date(
                 day_data["date_str"]
             ),
             disabled=day_data["is_disabled"],
@@ -38,7 +38,7 @@ def _day_component(day_data: dict) -> rx.Component:
                 day_data["is_disabled"],
                 "p-2 rounded-full w-10 h-10 flex items-center justify-center text-gray-300 cursor-not-allowed",
                 rx.cond(
-                    day_data["is_selected"],
+                    day_data["date_str"] == BookingState.selected_date,
                     "p-2 rounded-full bg-blue-600 text-white w-10 h-10 flex items-center justify-center font-bold shadow-lg",
                     rx.cond(
                         day_data["is_today"],
@@ -56,18 +56,18 @@ def calendar_view() -> rx.Component:
     return rx.el.div(
         _calendar_header(),
         rx.el.div(
-            rx.foreach(
-                BarberState.week_days,
-                lambda day: rx.el.div(
+            *[
+                rx.el.div(
                     day,
                     class_name="text-center font-medium text-sm text-gray-500",
-                ),
-            ),
+                )
+                for day in WEEK_DAYS
+            ],
             class_name="grid grid-cols-7 gap-2 mb-2",
         ),
         rx.el.div(
             rx.foreach(
-                BarberState.calendar_weeks,
+                BookingState.calendar_weeks,
                 lambda week: rx.el.div(
                     rx.foreach(week, _day_component),
                     class_name="grid grid-cols-7 gap-2",
@@ -82,7 +82,7 @@ def calendar_view() -> rx.Component:
 def barber_selection_view() -> rx.Component:
     return rx.el.div(
         rx.el.h4(
-            f"Seleccione un barbero para {BarberState.selected_date}",
+            f"Seleccione un barbero para {BookingState.selected_date}",
             class_name="font-semibold mb-4 text-center text-gray-700",
         ),
         rx.el.select(
@@ -92,13 +92,13 @@ def barber_selection_view() -> rx.Component:
                 disabled=True,
             ),
             rx.foreach(
-                BarberState.barber_names,
+                BookingState.barber_names,
                 lambda barber: rx.el.option(
                     barber, value=barber
                 ),
             ),
-            on_change=BarberState.select_barber,
-            value=BarberState.selected_barber,
+            on_change=BookingState.select_barber,
+            value=BookingState.selected_barber,
             class_name="w-full px-4 py-2 rounded-lg border border-gray-300 focus:ring-2 focus:ring-blue-500 focus:border-transparent transition-colors appearance-none bg-white",
         ),
         class_name="w-full mt-6",
@@ -116,10 +116,10 @@ def time_slots_view() -> rx.Component:
                 format="hh:mm A",
                 parse="HH:mm",
             ),
-            on_click=lambda: BarberState.select_time(time),
+            on_click=lambda: BookingState.select_time(time),
             type="button",
             class_name=rx.cond(
-                BarberState.selected_time == time,
+                BookingState.selected_time == time,
                 "w-full py-2 px-4 rounded-lg bg-blue-600 text-white font-semibold shadow-md",
                 "w-full py-2 px-4 rounded-lg bg-gray-100 hover:bg-blue-100 text-gray-800 font-medium transition-colors",
             ),
@@ -127,16 +127,16 @@ def time_slots_view() -> rx.Component:
 
     return rx.el.div(
         rx.el.h4(
-            f"Horas disponibles para {BarberState.selected_barber} el {BarberState.selected_date}",
+            f"Horas disponibles para {BookingState.selected_barber} el {BookingState.selected_date}",
             class_name="font-semibold mb-4 text-center text-gray-700",
         ),
         rx.cond(
-            BarberState.available_times_for_selected_date_and_barber.length()
+            BookingState.available_times.length()
             > 0,
             rx.el.div(
                 # Morning Slots
                 rx.cond(
-                    BarberState.morning_times.length() > 0,
+                    BookingState.morning_times.length() > 0,
                     rx.el.div(
                         rx.el.h5(
                             "Mañana",
@@ -144,7 +144,7 @@ def time_slots_view() -> rx.Component:
                         ),
                         rx.el.div(
                             rx.foreach(
-                                BarberState.morning_times,
+                                BookingState.morning_times,
                                 time_button,
                             ),
                             class_name="grid grid-cols-3 sm:grid-cols-4 gap-3",
@@ -153,7 +153,7 @@ def time_slots_view() -> rx.Component:
                 ),
                 # Afternoon Slots
                 rx.cond(
-                    BarberState.afternoon_times.length() > 0,
+                    BookingState.afternoon_times.length() > 0,
                     rx.el.div(
                         rx.el.div(
                             class_name="my-4 border-t border-gray-200"
@@ -164,7 +164,7 @@ def time_slots_view() -> rx.Component:
                         ),
                         rx.el.div(
                             rx.foreach(
-                                BarberState.afternoon_times,
+                                BookingState.afternoon_times,
                                 time_button,
                             ),
                             class_name="grid grid-cols-3 sm:grid-cols-4 gap-3",
@@ -187,13 +187,13 @@ def scheduler() -> rx.Component:
     return rx.el.div(
         calendar_view(),
         rx.cond(
-            (BarberState.selected_date != "")
-            & (BarberState.barbers.length() > 0),
+            (BookingState.selected_date != "")
+            & (BookingState.barbers.length() > 0),
             barber_selection_view(),
         ),
         rx.cond(
-            (BarberState.selected_date != "")
-            & (BarberState.selected_barber != ""),
+            (BookingState.selected_date != "")
+            & (BookingState.selected_barber != ""),
             time_slots_view(),
         ),
         class_name="flex flex-col items-center gap-4 w-full",
@@ -1,5 +1,6 @@
 import reflex as rx
-from app.states.state import BarberState
+from app.states.db_service import BOOKING_CODE_LENGTH
+from app.states.booking_state import BookingState
 
 
 def _found_appointment_card() -> rx.Component:
@@ -14,23 +15,23 @@ def _found_appointment_card() -> rx.Component:
         rx.el.div(
             rx.el.p(
                 rx.el.span("Nombre: ", class_name="font-medium"),
-                f"{BarberState.found_appointment['name']} {BarberState.found_appointment['last_name']}",
+                f"{BookingState.found_appointment['name']} {BookingState.found_appointment['last_name']}",
             ),
             rx.el.p(
                 rx.el.span("Fecha: ", class_name="font-medium"),
-                BarberState.found_appointment["date"],
+                BookingState.found_appointment["date"],
             ),
             rx.el.p(
                 rx.el.span("Hora: ", class_name="font-medium"),
                 rx.moment(
-                    BarberState.found_appointment["time"],
+                    BookingState.found_appointment["time"],
                     format="hh:mm A",
                     parse="HH:mm",
                 ),
             ),
             rx.el.p(
                 rx.el.span("Barbero: ", class_name="font-medium"),
-                BarberState.found_appointment["barber"],
+                BookingState.found_appointment["barber"],
             ),
             class_name="flex flex-col gap-1 text-gray-700",
         ),
@@ -41,7 +42,7 @@ def _found_appointment_card() -> rx.Component:
                 class_name="font-semibold text-gray-800 mb-2 mt-4",
             ),
             rx.foreach(
-                BarberState.found_appointment_services_details,
+                BookingState.found_appointment_services_details,
                 lambda service: rx.el.div(
                     rx.el.p(service["name"]),
                     rx.el.p(f"${service['price']}"),
@@ -52,7 +53,7 @@ def _found_appointment_card() -> rx.Component:
             rx.el.div(
                 rx.el.p("Total a Pagar", class_name="font-bold"),
                 rx.el.p(
-                    f"${BarberState.found_appointment_total_price}",
+                    f"${BookingState.found_appointment_total_price}",
                     class_name="font-bold",
                 ),
                 class_name="flex justify-between text-base text-gray-900 mt-2",
@@ -62,7 +63,7 @@ def _found_appointment_card() -> rx.Component:
         # Cancel Button
         rx.el.button(
             "Cancelar Cita",
-            on_click=BarberState.cancel_found_appointment,
+            on_click=BookingState.cancel_found_appointment,
             class_name="w-full mt-4 py-2 bg-red-600 text-white rounded-lg font-semibold hover:bg-red-700 transition-all",
             type="button",
         ),
@@ -88,7 +89,7 @@ def _cancel_confirmation_dialog() -> rx.Component:
                 rx.alert_dialog.action(
                     rx.el.button(
                         "Sí, Cancelar Cita",
-                        on_click=BarberState.confirm_cancellation,
+                        on_click=BookingState.confirm_cancellation,
                         class_name="px-4 py-2 bg-red-600 text-white rounded-lg",
                     )
                 ),
@@ -96,15 +97,15 @@ def _cancel_confirmation_dialog() -> rx.Component:
             ),
             class_name="z-50",
         ),
-        open=BarberState.show_cancel_alert,
-        on_open_change=BarberState.toggle_cancel_alert,
+        open=BookingState.show_cancel_alert,
+        on_open_change=BookingState.toggle_cancel_alert,
     )
 
 
 def search_dialog() -> rx.Component:
     """The modal dialog for searching an appointment by booking code."""
     return rx.cond(
-        BarberState.show_search_dialog,
+        BookingState.show_search_dialog,
         rx.el.div(
             _cancel_confirmation_dialog(),
             rx.el.div(
@@ -116,22 +117,22 @@ def search_dialog() -> rx.Component:
                         ),
                         rx.el.button(
                             rx.icon("x", class_name="w-5 h-5"),
-                            on_click=BarberState.close_search_dialog,
+                            on_click=BookingState.close_search_dialog,
                             class_name="text-gray-400 hover:text-gray-600 p-1 rounded-full",
                         ),
                         class_name="flex justify-between items-center",
                     ),
                     rx.el.p(
-                        "Ingrese su código de 4 dígitos para ver los detalles de su cita.",
+                        "Ingrese su código de reserva para ver los detalles de su cita.",
                         class_name="text-sm text-gray-500 mt-1",
                     ),
                     rx.el.form(
                         rx.el.div(
                             rx.el.input(
                                 name="booking_code",
-                                placeholder="1234",
-                                max_length=4,
-                                class_name="flex-grow px-4 py-2 rounded-lg sm:rounded-r-none border border-gray-300 focus:ring-2 focus:ring-blue-500",
+                                placeholder="Código de reserva",
+                                max_length=BOOKING_CODE_LENGTH,
+                                class_name="flex-grow uppercase px-4 py-2 rounded-lg sm:rounded-r-none border border-gray-300 focus:ring-2 focus:ring-blue-500",
                             ),
                             rx.el.button(
                                 "Buscar",
@@ -140,17 +141,17 @@ def search_dialog() -> rx.Component:
                             ),
                             class_name="flex flex-col sm:flex-row gap-2 sm:gap-0 mt-4",
                         ),
-                        on_submit=BarberState.find_appointment,
+                        on_submit=BookingState.find_appointment,
                         reset_on_submit=True,
                     ),
                     # Display search result or error
                     rx.cond(
-                        BarberState.found_appointment,
+                        BookingState.found_appointment,
                         _found_appointment_card(),
                         rx.cond(
-                            BarberState.search_error_message != "",
+                            BookingState.search_error_message != "",
                             rx.el.p(
-                                BarberState.search_error_message,
+                                BookingState.search_error_message,
                                 class_name="text-red-500 text-sm mt-2 text-center",
                             ),
                         ),
@@ -160,7 +161,7 @@ def search_dialog() -> rx.Component:
                 class_name="fixed inset-0 z-50 flex items-center justify-center p-1",
             ),
             rx.el.div(
-                on_click=BarberState.close_search_dialog,
+                on_click=BookingState.close_search_dialog,
                 class_name="fixed inset-0 z-40 bg-black/60 backdrop-blur-sm transition-opacity duration-300",
             ),
         ),
@@ -1,6 +1,8 @@
 import reflex as rx
 from app.states.auth_state import AuthState
-from app.states.state import BarberState, Barber, Service
+from app.states.booking_state import WEEK_DAYS
+from app.states.db_service import SLOT_TIMES
+from app.states.state import BarberState, Barber, Service, WEEKDAY_NAMES
 from app.components.appointment_list import appointment_list
 
 
@@ -257,12 +259,16 @@ def _availability_calendar_day(day_data: dict) -> rx.Component:
                 day_data["is_disabled"],
                 "p-2 rounded-full w-10 h-10 flex items-center justify-center text-gray-300 cursor-not-allowed",
                 rx.cond(
-                    day_data["is_selected"],
+                    day_data["date_str"] == BarberState.availability_selected_date,
                     "p-2 rounded-full bg-blue-600 text-white w-10 h-10 flex items-center justify-center font-bold shadow-lg",
                     rx.cond(
                         day_data["is_today"],
                         "p-2 rounded-full bg-blue-100 text-blue-600 w-10 h-10 flex items-center justify-center font-semibold",
-                        "p-2 rounded-full hover:bg-gray-100 w-10 h-10 flex items-center justify-center transition-colors",
+                        rx.cond(
+                            day_data["has_availability"],
+                            "p-2 rounded-full bg-green-50 text-green-700 hover:bg-green-100 w-10 h-10 flex items-center justify-center font-medium transition-colors",
+                            "p-2 rounded-full hover:bg-gray-100 w-10 h-10 flex items-center justify-center transition-colors",
+                        ),
                     ),
                 ),
             ),
@@ -271,6 +277,19 @@ def _availability_calendar_day(day_data: dict) -> rx.Component:
     )
 
 
+def _slot_toggle(time: str, selected_times, on_toggle) -> rx.Component:
+    """A button that toggles one of SLOT_TIMES in selected_times."""
+    return rx.el.button(
+        rx.moment(time, format="hh:mm A", parse="HH:mm"),
+        on_click=lambda: on_toggle(time),
+        class_name=rx.cond(
+            selected_times.contains(time),
+            "w-full py-2 px-2 rounded-lg bg-blue-600 text-white font-semibold shadow-md",
+            "w-full py-2 px-2 rounded-lg bg-gray-100 hover:bg-blue-100 text-gray-800 font-medium transition-colors",
+        ),
+    )
+
+
 def availability_manager() -> rx.Component:
     """Component to manage barber availability."""
     return rx.el.div(
@@ -315,13 +334,13 @@ def availability_manager() -> rx.Component:
                     class_name="flex items-center justify-between mb-4",
                 ),
                 rx.el.div(
-                    rx.foreach(
-                        BarberState.week_days,
-                        lambda day: rx.el.div(
+                    *[
+                        rx.el.div(
                             day,
                             class_name="text-center font-medium text-sm text-gray-500",
-                        ),
-                    ),
+                        )
+                        for day in WEEK_DAYS
+                    ],
                     class_name="grid grid-cols-7 gap-2 mb-2",
                 ),
                 rx.el.div(
@@ -345,18 +364,14 @@ def availability_manager() -> rx.Component:
                         class_name="font-semibold mb-4 text-center text-gray-700",
                     ),
                     rx.el.div(
-                        rx.foreach(
-                            BarberState.all_possible_times,
-                            lambda time: rx.el.button(
-                                rx.moment(time, format="hh:mm A", parse="HH:mm"),
-                                on_click=lambda: BarberState.toggle_availability_time(time),
-                                class_name=rx.cond(
-                                    BarberState.availability_selected_times.contains(time),
-                                    "w-full py-2 px-2 rounded-lg bg-blue-600 text-white font-semibold shadow-md",
-                                    "w-full py-2 px-2 rounded-lg bg-gray-100 hover:bg-blue-100 text-gray-800 font-medium transition-colors",
-                                ),
-                            ),
-                        ),
+                        *[
+                            _slot_toggle(
+                                time,
+                                BarberState.availability_selected_times,
+                                BarberState.toggle_availability_time,
+                            )
+                            for time in SLOT_TIMES
+                        ],
                         class_name="grid grid-cols-3 sm:grid-cols-4 gap-3",
                     ),
                     rx.el.button(
@@ -373,6 +388,139 @@ def availability_manager() -> rx.Component:
     )
 
 
+def _exception_item(exception: dict) -> rx.Component:
+    return rx.el.div(
+        rx.el.p(
+            exception["date"],
+            rx.cond(
+                exception["reason"] != "",
+                rx.el.span(
+                    f" - {exception['reason']}",
+                    class_name="text-gray-500",
+                ),
+            ),
+            class_name="font-medium",
+        ),
+        rx.el.button(
+            rx.icon("trash", class_name="w-4 h-4"),
+            on_click=lambda: BarberState.delete_exception(exception["date"]),
+            class_name="p-2 text-gray-500 hover:text-red-600 hover:bg-red-50 rounded-full",
+        ),
+        class_name="flex justify-between items-center p-3 hover:bg-gray-50 rounded-lg",
+    )
+
+
+def template_manager() -> rx.Component:
+    """Weekly template and days off for the barber selected above."""
+    return rx.el.div(
+        rx.el.h2(
+            "Plantilla Semanal",
+            class_name="text-2xl font-bold text-gray-800 mb-2 text-left",
+        ),
+        rx.el.p(
+            "Define los horarios de cada día de la semana para el barbero seleccionado y aplícalos a un rango de fechas.",
+            class_name="text-sm text-gray-500 mb-4",
+        ),
+        rx.el.div(
+            # Template day editor
+            rx.el.div(
+                rx.el.select(
+                    *[
+                        rx.el.option(day, value=str(index))
+                        for index, day in enumerate(WEEKDAY_NAMES)
+                    ],
+                    value=BarberState.template_weekday,
+                    on_change=BarberState.handle_template_weekday_change,
+                    class_name="w-full px-4 py-2 mb-4 rounded-lg border border-gray-300 focus:ring-2 focus:ring-blue-500 bg-white",
+                ),
+                rx.el.div(
+                    *[
+                        _slot_toggle(
+                            time,
+                            BarberState.template_times,
+                            BarberState.toggle_template_time,
+                        )
+                        for time in SLOT_TIMES
+                    ],
+                    class_name="grid grid-cols-3 sm:grid-cols-4 gap-3",
+                ),
+                rx.el.button(
+                    "Guardar Plantilla",
+                    on_click=BarberState.save_template_day,
+                    class_name="w-full mt-6 py-3 bg-blue-600 text-white rounded-lg font-semibold hover:bg-blue-700 transition-all",
+                ),
+                class_name="w-full md:w-1/2",
+            ),
+            # Range expansion and days off
+            rx.el.div(
+                rx.el.h4(
+                    "Aplicar a un rango de fechas",
+                    class_name="font-semibold mb-4 text-gray-700",
+                ),
+                rx.el.div(
+                    rx.el.input(
+                        type="date",
+                        default_value=BarberState.template_start_date,
+                        on_change=BarberState.set_template_start_date,
+                        class_name="w-full px-4 py-2 rounded-lg border border-gray-300 focus:ring-2 focus:ring-blue-500",
+                    ),
+                    rx.el.input(
+                        type="date",
+                        default_value=BarberState.template_end_date,
+                        on_change=BarberState.set_template_end_date,
+                        class_name="w-full px-4 py-2 rounded-lg border border-gray-300 focus:ring-2 focus:ring-blue-500",
+                    ),
+                    class_name="grid grid-cols-1 sm:grid-cols-2 gap-4",
+                ),
+                rx.el.button(
+                    "Aplicar Plantilla",
+                    on_click=BarberState.apply_template,
+                    class_name="w-full mt-4 py-3 bg-blue-600 text-white rounded-lg font-semibold hover:bg-blue-700 transition-all",
+                ),
+                rx.el.div(
+                    class_name="my-6 border-t border-gray-200"
+                ),
+                rx.el.h4(
+                    "Días libres",
+                    class_name="font-semibold mb-4 text-gray-700",
+                ),
+                rx.el.form(
+                    rx.el.div(
+                        rx.el.input(
+                            type="date",
+                            name="date",
+                            class_name="w-full px-4 py-2 rounded-lg border border-gray-300 focus:ring-2 focus:ring-blue-500",
+                        ),
+                        rx.el.input(
+                            placeholder="Motivo (opcional)",
+                            name="reason",
+                            class_name="w-full px-4 py-2 rounded-lg border border-gray-300 focus:ring-2 focus:ring-blue-500",
+                        ),
+                        rx.el.button(
+                            "Agregar",
+                            type="submit",
+                            class_name="px-6 py-2 bg-blue-600 text-white rounded-lg font-medium hover:bg-blue-700",
+                        ),
+                        class_name="flex flex-col sm:flex-row gap-2",
+                    ),
+                    on_submit=BarberState.add_exception,
+                    reset_on_submit=True,
+                ),
+                rx.el.div(
+                    rx.foreach(
+                        BarberState.availability_exceptions,
+                        _exception_item,
+                    ),
+                    class_name="flex flex-col gap-2 mt-4",
+                ),
+                class_name="w-full md:w-1/2 p-4 md:p-8 border-l border-gray-200",
+            ),
+            class_name="flex flex-col md:flex-row gap-8",
+        ),
+        class_name="w-full bg-white p-6 rounded-xl shadow-md border border-gray-100 mb-8",
+    )
+
+
 def _filter_controls() -> rx.Component:
     return rx.el.div(
         rx.el.h3(
@@ -453,6 +601,7 @@ def admin_page() -> rx.Component:
                 class_name="grid grid-cols-1 lg:grid-cols-2 gap-8 mb-8",
             ),
             availability_manager(),
+            template_manager(),
             _filter_controls(),
             appointment_list(),
             class_name="container mx-auto flex flex-col items-center p-4 md:p-8",
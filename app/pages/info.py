@@ -1,6 +1,6 @@
 import reflex as rx
 from app.components.layout import client_layout
-from app.states.state import BarberState
+from app.states.booking_state import BookingState
 
 
 def faq_item(question: str, answer: str) -> rx.Component:
@@ -109,10 +109,10 @@ def info_page() -> rx.Component:
                                 class_name="text-2xl font-bold text-gray-800 mb-4",
                             ),
                             rx.cond(
-                                BarberState.services.length() > 0,
+                                BookingState.services.length() > 0,
                                 rx.el.div(
                                     rx.foreach(
-                                        BarberState.services,
+                                        BookingState.services,
                                         lambda service: rx.el.div(
                                             rx.el.p(
                                                 service["name"],
@@ -187,6 +187,6 @@ def info_page() -> rx.Component:
                 class_name="container mx-auto flex flex-col items-center p-4 md:p-8",
             ),
             class_name="min-h-screen bg-gray-50 font-['Inter'] pb-24 md:pt-20 md:pb-8",
-            on_mount=BarberState.load_data,
+            on_mount=BookingState.load_data,
         ),
     )
@@ -0,0 +1,386 @@
+import reflex as rx
+from typing import Optional
+import asyncio
+import datetime
+import calendar
+import uuid
+from app.states.db_service import (
+    BOOKING_OK,
+    BOOKING_SLOT_TAKEN,
+    add_months,
+    month_key,
+    normalize_booking_code,
+    Appointment,
+    Barber,
+    Service,
+)
+from app.states.db_async import (
+    get_open_times,
+    get_open_days,
+    add_appointment_db,
+    delete_appointment_db,
+    get_appointment_by_code,
+    allocate_booking_code,
+    get_all_barbers,
+    get_all_services,
+)
+
+SPANISH_MONTHS = (
+    "Enero",
+    "Febrero",
+    "Marzo",
+    "Abril",
+    "Mayo",
+    "Junio",
+    "Julio",
+    "Agosto",
+    "Septiembre",
+    "Octubre",
+    "Noviembre",
+    "Diciembre",
+)
+WEEK_DAYS = ("Lu", "Ma", "Mi", "Ju", "Vi", "Sá", "Do")
+
+
+class BookingState(rx.State):
+    """State for the public pages (/ and /info).
+
+    Holds only what a visitor needs to book: barbers, services, the open
+    days of the displayed month and the open times for the chosen barber
+    and date. Other customers' appointments stay on the server, so the
+    state does not grow with the appointment book.
+    """
+
+    barbers: list[Barber] = []
+    services: list[Service] = []
+    display_month_date: datetime.date = (
+        datetime.date.today()
+    )
+    # Days of the displayed month with an open slot; bit d - 1 is day d
+    open_days_mask: int = 0
+    selected_date: str = ""
+    selected_time: str = ""
+    selected_barber: str = ""
+    selected_services: list[str] = []
+    # Open times for the selected barber and date
+    available_times: list[str] = []
+    show_confirm_dialog: bool = False
+    # The submitted form stays on the server; the dialog shows the two lines below.
+    _pending_appointment_data: dict = {}
+    pending_customer: str = ""
+    pending_phone: str = ""
+    pending_booking_code: str = ""
+
+    # Appointment search state
+    show_search_dialog: bool = False
+    search_booking_code: str = ""
+    found_appointment: Optional[Appointment] = None
+    search_error_message: str = ""
+    show_cancel_alert: bool = False
+
+    @rx.event(background=True)
+    async def load_data(self):
+        async with self:
+            month = month_key(self.display_month_date)
+        barbers, services, open_days = await asyncio.gather(
+            get_all_barbers(),
+            get_all_services(),
+            get_open_days(month),
+        )
+        async with self:
+            self.barbers = barbers
+            self.services = services
+            self.open_days_mask = open_days
+
+    @rx.event
+    def select_date(self, date_str: str):
+        self.selected_date = date_str
+        self.selected_time = ""
+        self.selected_barber = ""
+        self.selected_services = []
+        self.available_times = []
+
+    @rx.event
+    async def select_barber(self, barber: str):
+        self.selected_barber = barber
+        self.selected_time = ""
+        await self._load_available_times()
+
+    @rx.event
+    def select_time(self, time_str: str):
+        self.selected_time = time_str
+
+    @rx.event
+    def toggle_service(self, service_name: str):
+        if service_name in self.selected_services:
+            self.selected_services.remove(service_name)
+        else:
+            self.selected_services.append(service_name)
+
+    @rx.event
+    async def change_month(self, delta: int):
+        self.display_month_date = add_months(self.display_month_date, delta)
+        self.open_days_mask = await get_open_days(
+            month_key(self.display_month_date)
+        )
+        return BookingState.prefetch_adjacent_months
+
+    @rx.event(background=True)
+    async def prefetch_adjacent_months(self):
+        """Warms the server-side slot cache for the months around the displayed one.
+
+        Nothing is stored in this state, so the client payload does not grow.
+        """
+        async with self:
+            displayed = self.display_month_date
+        await asyncio.gather(
+            get_open_days(month_key(add_months(displayed, -1))),
+            get_open_days(month_key(add_months(displayed, 1))),
+        )
+
+    async def _load_available_times(self):
+        """Loads the open times for the selected barber and date."""
+        self.available_times = []
+        if not self.selected_date or not self.selected_barber:
+            return
+
+        # Find the barber's ID from their name
+        barber_id = None
+        for b in self.barbers:
+            if b["name"] == self.selected_barber:
+                barber_id = b["id"]
+                break
+        if not barber_id:
+            return
+
+        # Booked and already-past times are filtered out on the server.
+        self.available_times = await get_open_times(barber_id, self.selected_date)
+
+    @rx.event
+    async def prepare_appointment(self, form_data: dict):
+        if not form_data.get("name") or not form_data.get("last_name") or not form_data.get("phone") or not self.selected_services:
+            return rx.toast(
+                "Por favor, complete todos los campos y seleccione al menos un servicio.",
+                duration=3000,
+            )
+        self._pending_appointment_data = form_data
+        self.pending_customer = f"{form_data['name']} {form_data['last_name']}"
+        self.pending_phone = form_data["phone"]
+        self.pending_booking_code = await allocate_booking_code()
+        self.show_confirm_dialog = True
+
+    @rx.event
+    async def confirm_appointment(self):
+        if (
+            not self.selected_date
+            or not self.selected_time
+            or not self.selected_barber
+            or not self.selected_services
+        ):
+            yield rx.toast(
+                "Error: faltan detalles de la cita.",
+                duration=3000,
+            )
+            return
+        new_appointment = Appointment(
+            id=str(uuid.uuid4()),
+            name=self._pending_appointment_data["name"],
+            last_name=self._pending_appointment_data["last_name"],
+            phone=self._pending_appointment_data["phone"],
+            date=self.selected_date,
+            time=self.selected_time,
+            services=self.selected_services,
+            service_prices=[],
+            barber=self.selected_barber,
+            booking_code=self.pending_booking_code,
+        )
+        result, booking_code = await add_appointment_db(new_appointment)
+        if result != BOOKING_OK:
+            self._clear_pending()
+            if result == BOOKING_SLOT_TAKEN:
+                self.selected_time = ""
+                await self._load_available_times()
+                yield rx.toast(
+                    "Ese horario acaba de ser reservado. Por favor, elige otro.",
+                    duration=3000,
+                )
+            else:
+                yield rx.toast(
+                    "Error: no se pudo agendar la cita.",
+                    duration=3000,
+                )
+            return
+        self._clear_pending()
+        self.selected_date = ""
+        self.selected_time = ""
+        self.selected_barber = ""
+        self.selected_services = []
+        self.available_times = []
+        yield BookingState.load_data
+        yield rx.toast(
+            f"Cita agendada con éxito! Su código es {booking_code}.",
+            duration=5000,
+        )
+
+    def _clear_pending(self):
+        self.show_confirm_dialog = False
+        self._pending_appointment_data = {}
+        self.pending_customer = ""
+        self.pending_phone = ""
+        self.pending_booking_code = ""
+
+    @rx.event
+    def cancel_confirmation(self):
+        self._clear_pending()
+
+    # --- Appointment Search Events ---
+    @rx.event
+    def toggle_search_dialog(self):
+        self.show_search_dialog = not self.show_search_dialog
+        # Reset search state when opening
+        if self.show_search_dialog:
+            self.search_booking_code = ""
+            self.found_appointment = None
+            self.search_error_message = ""
+
+    @rx.event
+    async def find_appointment(self, form_data: dict):
+        code = normalize_booking_code(form_data.get("booking_code", ""))
+        if not code:
+            self.search_error_message = "Por favor, ingrese un código."
+            return
+
+        appointment = await get_appointment_by_code(code)
+        if appointment:
+            self.found_appointment = appointment
+            self.search_error_message = ""
+        else:
+            self.found_appointment = None
+            self.search_error_message = "No se encontró ninguna cita con ese código."
+
+    @rx.event
+    def close_search_dialog(self):
+        self.show_search_dialog = False
+        self.search_booking_code = ""
+        self.found_appointment = None
+        self.search_error_message = ""
+        self.show_cancel_alert = False
+
+    @rx.event
+    def cancel_found_appointment(self):
+        """Shows the confirmation dialog to cancel the appointment."""
+        self.show_cancel_alert = True
+
+    @rx.event
+    async def confirm_cancellation(self):
+        """Cancels the appointment found via the search dialog after confirmation."""
+        if self.found_appointment:
+            await delete_appointment_db(self.found_appointment["id"])
+            self.close_search_dialog()
+            return [
+                BookingState.load_data,
+                rx.toast("Cita cancelada con éxito.", duration=3000),
+            ]
+
+    @rx.event
+    def toggle_cancel_alert(self):
+        self.show_cancel_alert = not self.show_cancel_alert
+
+    # --- Computed Vars ---
+
+    @rx.var
+    def barber_names(self) -> list[str]:
+        return [barber["name"] for barber in self.barbers]
+
+    @rx.var
+    def display_month_str(self) -> str:
+        month_index = self.display_month_date.month - 1
+        return f"{SPANISH_MONTHS[month_index]} {self.display_month_date.year}"
+
+    @rx.var
+    def calendar_weeks(self) -> list[list[dict]]:
+        cal = calendar.Calendar(firstweekday=0)
+        month_days = cal.monthdayscalendar(
+            self.display_month_date.year,
+            self.display_month_date.month,
+        )
+        weeks = []
+        today = datetime.date.today()
+        for week in month_days:
+            week_data = []
+            for day in week:
+                if day == 0:
+                    week_data.append({"is_in_month": False})
+                    continue
+                date_obj = datetime.date(
+                    self.display_month_date.year,
+                    self.display_month_date.month,
+                    day,
+                )
+                date_str = date_obj.strftime("%Y-%m-%d")
+
+                # A day is disabled if it's in the past OR if no barber has an open slot on it.
+                is_past = date_obj <= today
+                is_available = self.open_days_mask >> (day - 1) & 1
+                is_disabled = is_past or not is_available
+
+                # The selected day is compared in the component, so picking
+                # a day does not resend the whole month.
+                week_data.append(
+                    {
+                        "day": day,
+                        "is_in_month": True,
+                        "is_today": date_obj == today,
+                        "date_str": date_str,
+                        "is_disabled": is_disabled,
+                    }
+                )
+            weeks.append(week_data)
+        return weeks
+
+    @rx.var
+    def morning_times(self) -> list[str]:
+        """Devuelve los horarios de la mañana disponibles."""
+        return [
+            t for t in self.available_times
+            if int(t.split(":")[0]) < 12
+        ]
+
+    @rx.var
+    def afternoon_times(self) -> list[str]:
+        """Devuelve los horarios de la tarde disponibles."""
+        return [
+            t for t in self.available_times
+            if int(t.split(":")[0]) >= 12
+        ]
+
+    @rx.var
+    def selected_services_details(self) -> list[Service]:
+        """Devuelve los detalles de los servicios seleccionados."""
+        return [
+            s for s in self.services if s["name"] in self.selected_services
+        ]
+
+    @rx.var
+    def total_price(self) -> int:
+        """Calcula el precio total de los servicios seleccionados."""
+        return sum(s["price"] for s in self.selected_services_details)
+
+    @rx.var
+    def found_appointment_services_details(self) -> list[Service]:
+        """Devuelve los detalles de los servicios para la cita encontrada."""
+        if not self.found_appointment:
+            return []
+        # Prices as charged at booking time, not the current list prices
+        return [
+            Service(id="", name=name, price=price)
+            for name, price in zip(
+                self.found_appointment["services"],
+                self.found_appointment["service_prices"],
+            )
+        ]
+
+    @rx.var
+    def found_appointment_total_price(self) -> int:
+        """Calcula el precio total para la cita encontrada."""
+        return sum(s["price"] for s in self.found_appointment_services_details)
@@ -0,0 +1,240 @@
+"""Process-wide caches for data that is read far more often than it changes.
+
+Each cached name carries a version counter. Writers call invalidate(name),
+which bumps the counter so the next read reloads, and, when REDIS_URL is
+set, publishes the name so every other backend worker bumps it as well.
+Per-barber, per-month open slots live in a bounded LRU that is
+invalidated the same way through invalidate_availability().
+"""
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, TypeVar
+
+import redis
+
+REDIS_URL = os.environ.get("REDIS_URL", "")
+CACHE_CHANNEL = os.environ.get("CACHE_CHANNEL", "agenda:cache-invalidate")
+# Upper bound on staleness in case an invalidation message is lost.
+REFERENCE_CACHE_TTL = float(os.environ.get("REFERENCE_CACHE_TTL", "300"))
+# (barber_id, month) pairs kept in the availability cache before the least
+# recently used one is evicted.
+AVAILABILITY_CACHE_SIZE = int(os.environ.get("AVAILABILITY_CACHE_SIZE", "2048"))
+
+T = TypeVar("T")
+
+
+class VersionedCache:
+    """Caches one loader result per name until the name's version changes."""
+
+    def __init__(self, ttl: float = REFERENCE_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._versions: dict[str, int] = {}
+        # Bumped by clear(), which invalidates every name at once.
+        self._generation = 0
+        self._entries: dict[str, tuple[tuple[int, int], float, object]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, loader: Callable[[], T]) -> T:
+        now = time.monotonic()
+        with self._lock:
+            version = (self._generation, self._versions.get(name, 0))
+            entry = self._entries.get(name)
+            if entry and entry[0] == version and now - entry[1] < self.ttl:
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        value = loader()
+        with self._lock:
+            # A bump while loading means the value may already be stale.
+            if (self._generation, self._versions.get(name, 0)) == version:
+                self._entries[name] = (version, now, value)
+        return value
+
+    def bump(self, name: str):
+        with self._lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+            self._entries.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def version(self, name: str) -> int:
+        with self._lock:
+            return self._versions.get(name, 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "versions": dict(self._versions),
+            }
+
+
+class LRUCache:
+    """A bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data: OrderedDict = OrderedDict()
+        # Bumped by every invalidation; a load that overlaps one is not stored.
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, loader: Callable[[], T]) -> T:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            generation = self._generation
+        value = loader()
+        with self._lock:
+            if self._generation == generation:
+                self._data[key] = value
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]):
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+
+# Barbers and services: read on every page load, edited only by admins.
+reference_cache = VersionedCache()
+# Open slots for one barber over one month, keyed (barber_id, "YYYY-MM").
+availability_cache = LRUCache(AVAILABILITY_CACHE_SIZE)
+
+# Published names of the form "availability:<barber_id>:<date>", where
+# either part may be the ANY wildcard, invalidate availability_cache
+# entries for that barber and the month containing the date.
+_AVAILABILITY_PREFIX = "availability:"
+ANY = "*"
+
+_redis: Optional[redis.Redis] = None
+_listener_pid: Optional[int] = None
+_listener_lock = threading.Lock()
+# Identifies this process's own messages so it does not bump twice.
+_origin = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _get_redis() -> Optional[redis.Redis]:
+    global _redis
+    if not REDIS_URL:
+        return None
+    if _redis is None:
+        _redis = redis.Redis.from_url(REDIS_URL, socket_connect_timeout=2)
+    return _redis
+
+
+def _listen():
+    """Applies invalidations published by other workers, reconnecting on error."""
+    delay = 1.0
+    while True:
+        try:
+            pubsub = _get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CACHE_CHANNEL)
+            # Anything published while disconnected was missed.
+            reference_cache.clear()
+            availability_cache.clear()
+            delay = 1.0
+            for message in pubsub.listen():
+                origin, _, name = message["data"].decode().partition("|")
+                if origin != _origin:
+                    _apply(name)
+        except Exception as e:
+            print(f"Cache invalidation listener error, retrying in {delay:.0f}s: {e}")
+            time.sleep(delay)
+            delay = min(delay * 2, 60.0)
+
+
+def ensure_listener():
+    """Starts the Redis listener thread once per process."""
+    global _redis, _listener_pid, _origin
+    if not REDIS_URL or _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        # A forked worker needs its own connection and thread.
+        _redis = None
+        _origin = f"{socket.gethostname()}:{os.getpid()}"
+        threading.Thread(target=_listen, name="cache-invalidation", daemon=True).start()
+        _listener_pid = os.getpid()
+
+
+def cached(name: str, loader: Callable[[], T]) -> T:
+    """Returns the cached value for name, loading it on a miss."""
+    ensure_listener()
+    return reference_cache.get(name, loader)
+
+
+def _apply(name: str):
+    if not name.startswith(_AVAILABILITY_PREFIX):
+        reference_cache.bump(name)
+        return
+    barber_id, _, date = name[len(_AVAILABILITY_PREFIX):].partition(":")
+    if barber_id == ANY and date == ANY:
+        availability_cache.clear()
+    else:
+        availability_cache.discard_where(
+            lambda key: barber_id in (ANY, key[0]) and (date == ANY or date[:7] == key[1])
+        )
+
+
+def cached_availability(barber_id: str, month: str, loader: Callable[[], T]) -> T:
+    """Returns the cached availability for a barber and month, loading it on a miss."""
+    ensure_listener()
+    return availability_cache.get((barber_id, month), loader)
+
+
+def invalidate_availability(barber_id: str = ANY, date: str = ANY):
+    """Drops cached availability for a barber, a date, or both, everywhere."""
+    invalidate(f"{_AVAILABILITY_PREFIX}{barber_id}:{date}")
+
+
+def invalidate(name: str):
+    """Drops the cached value for name in this and every other worker."""
+    _apply(name)
+    client = _get_redis()
+    if client is None:
+        return
+    try:
+        client.publish(CACHE_CHANNEL, f"{_origin}|{name}")
+    except redis.RedisError as e:
+        print(f"Could not publish cache invalidation for {name}: {e}")
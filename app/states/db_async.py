@@ -0,0 +1,77 @@
+"""Async variants of the db_service API for use in Reflex event handlers.
+
+sqlite3 calls block, so running them directly in an event handler stalls the
+event loop for every connected client. Each function here runs its
+db_service counterpart on a bounded thread pool and can simply be awaited.
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from app.states import db_service
+from app.states.db_service import DB_POOL_SIZE
+
+# Threads available for database calls; sized to the connection pool so
+# every thread can hold an idle pooled connection.
+DB_THREAD_POOL_SIZE = int(os.environ.get("DB_THREAD_POOL_SIZE", str(DB_POOL_SIZE)))
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=DB_THREAD_POOL_SIZE, thread_name_prefix="db"
+        )
+    return _executor
+
+
+async def run_db(fn: Callable, *args, **kwargs):
+    """Runs a blocking database function on the database thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), functools.partial(fn, *args, **kwargs)
+    )
+
+
+def _offload(fn: Callable) -> Callable:
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run_db(fn, *args, **kwargs)
+
+    return wrapper
+
+
+get_appointments_page = _offload(db_service.get_appointments_page)
+get_open_times = _offload(db_service.get_open_times)
+get_month_slots = _offload(db_service.get_month_slots)
+get_open_days = _offload(db_service.get_open_days)
+add_appointment_db = _offload(db_service.add_appointment_db)
+delete_appointment_db = _offload(db_service.delete_appointment_db)
+archive_past_appointments_db = _offload(db_service.archive_past_appointments_db)
+get_archive_summary = _offload(db_service.get_archive_summary)
+get_appointment_by_code = _offload(db_service.get_appointment_by_code)
+allocate_booking_code = _offload(db_service.allocate_booking_code)
+get_all_barbers = _offload(db_service.get_all_barbers)
+add_barber_db = _offload(db_service.add_barber_db)
+update_barber_db = _offload(db_service.update_barber_db)
+delete_barber_db = _offload(db_service.delete_barber_db)
+get_all_services = _offload(db_service.get_all_services)
+add_service_db = _offload(db_service.add_service_db)
+update_service_db = _offload(db_service.update_service_db)
+delete_service_db = _offload(db_service.delete_service_db)
+get_availability_for_barber = _offload(db_service.get_availability_for_barber)
+set_availability_for_barber = _offload(db_service.set_availability_for_barber)
+get_weekly_template = _offload(db_service.get_weekly_template)
+set_weekly_template_day = _offload(db_service.set_weekly_template_day)
+get_availability_exceptions = _offload(db_service.get_availability_exceptions)
+add_availability_exception = _offload(db_service.add_availability_exception)
+delete_availability_exception = _offload(db_service.delete_availability_exception)
+apply_weekly_template = _offload(db_service.apply_weekly_template)
+get_month_availability = _offload(db_service.get_month_availability)
+delete_past_availability_db = _offload(db_service.delete_past_availability_db)
+acquire_maintenance_lease = _offload(db_service.acquire_maintenance_lease)
+optimize_db = _offload(db_service.optimize_db)
@@ -1,10 +1,19 @@
 import reflex as rx
 import sqlite3
 import os
-from typing import TypedDict, List, Optional
+import json
+import queue
+import secrets
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Callable, Iterator, TypedDict, List, Optional
 import uuid
 import datetime
 
+from app.states import cache
+
 
 class Appointment(TypedDict):
     id: str
@@ -14,6 +23,7 @@ class Appointment(TypedDict):
     date: str
     time: str
     services: List[str]  # Changed from service: str
+    service_prices: List[int]  # Prices at booking time; set by the database
     barber: str
     booking_code: str
 
@@ -29,48 +39,436 @@ class Service(TypedDict):
     price: int
 
 
+class AvailabilityException(TypedDict):
+    date: str
+    reason: str
+
+
+class ArchiveSummary(TypedDict):
+    barber: str
+    appointments: int
+    revenue: int
+
+
+# Connection pool settings. DB_POOL_SIZE caps how many idle connections are
+# kept open per process; extra connections are opened on demand under load
+# and closed again when they are returned.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+DB_BUSY_TIMEOUT = float(os.environ.get("DB_BUSY_TIMEOUT", "5"))
+# WAL lets readers proceed while the writer commits; with WAL, NORMAL
+# synchronous only fsyncs at checkpoints instead of on every commit.
+DB_JOURNAL_MODE = os.environ.get("DB_JOURNAL_MODE", "WAL")
+DB_SYNCHRONOUS = os.environ.get("DB_SYNCHRONOUS", "NORMAL")
+# Maximum number of queued write requests committed in one transaction.
+DB_WRITE_BATCH_SIZE = int(os.environ.get("DB_WRITE_BATCH_SIZE", "64"))
+# Seconds a caller waits for its write to be committed before giving up.
+DB_WRITE_TIMEOUT = float(os.environ.get("DB_WRITE_TIMEOUT", "30"))
+# Appointments returned per page in the admin listing.
+APPOINTMENTS_PAGE_SIZE = int(os.environ.get("APPOINTMENTS_PAGE_SIZE", "50"))
+# Past appointments moved to the archive per write transaction.
+ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", "1000"))
+# Booking codes are drawn at random from BOOKING_CODE_ALPHABET; the default
+# leaves out look-alike characters (0/O, 1/I) and gives 32**6 possible codes.
+BOOKING_CODE_LENGTH = int(os.environ.get("BOOKING_CODE_LENGTH", "6"))
+BOOKING_CODE_ALPHABET = os.environ.get(
+    "BOOKING_CODE_ALPHABET", "23456789ABCDEFGHJKLMNPQRSTUVWXYZ"
+)
+
+
+# The bookable times of day, in order. Bit i of a slot mask stands for
+# SLOT_TIMES[i]; times outside this list cannot be booked from the site.
+SLOT_TIMES: tuple[str, ...] = (
+    "09:00", "09:30", "10:00", "10:30", "11:00", "11:30", "12:00", "12:30",
+    "14:00", "14:30", "15:00", "15:30", "16:00", "16:30", "17:00", "17:30",
+    "18:00", "18:30", "19:00", "19:30", "20:00", "20:30", "21:00", "21:30",
+    "22:00", "22:30", "23:00",
+)
+_SLOT_BITS = {slot: 1 << i for i, slot in enumerate(SLOT_TIMES)}
+
+
 def get_db_path() -> str:
-    return "app/states/app.db"
+    return os.environ.get("DB_PATH", "app/states/app.db")
 
 
-def get_db_connection() -> sqlite3.Connection:
-    """Establishes a connection to the SQLite database."""
-    db_path = get_db_path()
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+def _apply_pragmas(conn: sqlite3.Connection):
+    """Per-connection settings, applied once when the connection is opened."""
     # Enable foreign key support
     conn.execute("PRAGMA foreign_keys = ON")
-    return conn
+    conn.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
 
 
-def init_db():
-    """Initializes the database and creates tables if they don't exist."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    # Drop service column from appointments if it exists (for migration)
-    try:
-        cursor.execute("ALTER TABLE appointments DROP COLUMN service")
-    except sqlite3.OperationalError:
-        # Column doesn't exist, which is fine for new setups
-        pass
-    
-    # Add last_name column if it doesn't exist (for migration)
+class ConnectionPool:
+    """A thread-safe pool of long-lived SQLite connections."""
+
+    def __init__(self, db_path: str, size: int = DB_POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=size)
+        self._pid = os.getpid()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=DB_BUSY_TIMEOUT,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        _apply_pragmas(conn)
+        return conn
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self) -> sqlite3.Connection:
+        # Connections must never be shared with a forked worker process.
+        if os.getpid() != self._pid:
+            self._idle = queue.LifoQueue(maxsize=self.size)
+            self._pid = os.getpid()
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if self._is_healthy(conn):
+                return conn
+            conn.close()
+
+    def release(self, conn: sqlite3.Connection):
+        if os.getpid() != self._pid:
+            conn.close()
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait(conn)
+        except (sqlite3.Error, queue.Full):
+            conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Returns the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(get_db_path())
+    return _pool
+
+
+class _WriteRequest:
+    __slots__ = ("fn", "args", "future")
+
+    def __init__(self, fn: Callable, args: tuple):
+        self.fn = fn
+        self.args = args
+        self.future: Future = Future()
+
+
+class GroupCommitWriter:
+    """Serializes all writes onto one thread and commits them in groups.
+
+    Callers submit a function that receives the writer's connection. Requests
+    that queue up while a commit is in flight are run together inside a
+    single BEGIN IMMEDIATE ... COMMIT, each one wrapped in its own savepoint
+    so a failing request is rolled back without affecting the rest of the
+    group. Every caller gets back its own result or exception.
+    """
+
+    def __init__(self, pool: ConnectionPool, batch_size: int = DB_WRITE_BATCH_SIZE):
+        self.pool = pool
+        self.batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+
+    def _is_running(self) -> bool:
+        return (
+            self._thread is not None
+            and self._pid == os.getpid()
+            and self._thread.is_alive()
+        )
+
+    def _ensure_started(self):
+        if self._is_running():
+            return
+        with self._start_lock:
+            if not self._is_running():
+                if self._pid != os.getpid():
+                    # Requests queued in the parent belong to the parent.
+                    self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name="db-writer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, fn: Callable, *args, timeout: float = DB_WRITE_TIMEOUT):
+        """Runs fn(conn, *args) in the next group commit and returns its result.
+
+        Raises concurrent.futures.TimeoutError if the write has not been
+        committed within timeout seconds. A write that has not started by
+        then is dropped; one that has already started may still commit.
+        """
+        self._ensure_started()
+        request = _WriteRequest(fn, args)
+        self._queue.put(request)
+        try:
+            return request.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            request.future.cancel()
+            raise
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = self.pool._connect()
+        # Transactions are managed explicitly in _commit_batch.
+        conn.isolation_level = None
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._commit_batch(conn, batch)
+            except Exception as e:
+                # Keep the thread alive: fail this batch and start over on a
+                # fresh connection, since this one may be mid-transaction.
+                print(f"Database writer error: {e}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+                conn = self._connect()
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: list):
+        # Skip requests whose callers timed out and cancelled them.
+        batch = [
+            request for request in batch
+            if request.future.set_running_or_notify_cancel()
+        ]
+        if not batch:
+            return
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for request in batch:
+                conn.execute("SAVEPOINT write_request")
+                try:
+                    result = request.fn(conn, *request.args)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_request")
+                    conn.execute("RELEASE write_request")
+                    outcomes.append((request, None, e))
+                else:
+                    conn.execute("RELEASE write_request")
+                    outcomes.append((request, result, None))
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        for request, result, error in outcomes:
+            if error is not None:
+                request.future.set_exception(error)
+            else:
+                request.future.set_result(result)
+
+
+_writer: Optional[GroupCommitWriter] = None
+
+
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> GroupCommitWriter:
+    """Returns the process-wide writer, creating it on first use."""
+    global _writer
+    if _writer is None:
+        # get_pool() takes _pool_lock itself, so resolve it before locking.
+        pool = get_pool()
+        with _writer_lock:
+            if _writer is None:
+                _writer = GroupCommitWriter(pool)
+    return _writer
+
+
+def run_write(fn: Callable, *args):
+    """Runs a write function through the group-commit writer."""
+    return get_writer().submit(fn, *args)
+
+
+@contextmanager
+def get_db_connection() -> Iterator[sqlite3.Connection]:
+    """Checks a connection out of the pool and returns it when done."""
+    pool = get_pool()
+    conn = pool.acquire()
     try:
-        cursor.execute("ALTER TABLE appointments ADD COLUMN last_name TEXT NOT NULL DEFAULT ''")
-    except sqlite3.OperationalError:
-        # Column already exists
-        pass
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+# Secondary indexes for the hot query paths, created idempotently at startup.
+MANAGED_INDEXES = {
+    # Keyset pagination in start order, date filters and expiry
+    "idx_appointments_start": "appointments (start_minute, id)",
+    # Joining services onto their appointment
+    "idx_appointment_services_appointment": "appointment_services (appointment_id)",
+    # Service filter, and the ON DELETE RESTRICT check when deleting a service
+    "idx_appointment_services_service": "appointment_services (service_id)",
+    # Past-slot cleanup (DELETE ... WHERE date < ?)
+    "idx_barber_availability_date": "barber_availability (date)",
+    # Monthly per-barber reports; covers count and revenue
+    "idx_appointments_archive_month": "appointments_archive (month, barber, total_price)",
+    # A barber's or a customer's history in time order
+    "idx_appointments_archive_barber": "appointments_archive (barber, start_minute)",
+    "idx_appointments_archive_phone": "appointments_archive (phone, start_minute)",
+}
 
 
-    # Add booking_code column if it doesn't exist (for migration)
+# Indexes that also enforce an invariant.
+MANAGED_UNIQUE_INDEXES = {
+    # One appointment per barber and slot; also serves booked-time lookups
+    "idx_appointments_slot": "appointments (barber, date, time)",
+    # Booking codes are unique; legacy rows without one are left out.
+    # Also serves get_appointment_by_code.
+    "idx_appointments_code": "appointments (booking_code) WHERE booking_code <> ''",
+}
+
+
+def ensure_indexes(conn: sqlite3.Connection):
+    """Creates every managed index and drops retired ones."""
+    existing = {
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx!_%' ESCAPE '!'"
+        )
+    }
+    for name in existing - MANAGED_INDEXES.keys() - MANAGED_UNIQUE_INDEXES.keys():
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    for name, target in MANAGED_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+    for name, target in MANAGED_UNIQUE_INDEXES.items():
+        try:
+            conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {target}")
+        except sqlite3.IntegrityError as e:
+            # Fails the migration, so the schema version is not bumped and
+            # the index is retried on the next start.
+            raise RuntimeError(
+                f"Could not create unique index {name}: {e}; "
+                "resolve the duplicate rows and restart"
+            ) from e
+
+
+# Set by init_db when the FTS5 trigram index over customer names and phones
+# exists and is usable; searches fall back to LIKE scans otherwise.
+_search_index_available = False
+
+# Trigram matching needs at least three characters; shorter terms use LIKE.
+_TRIGRAM_MIN_LENGTH = 3
+
+
+def _ensure_search_index(conn: sqlite3.Connection, rebuild: bool = False) -> bool:
+    """Creates the appointments_search FTS5 table and the triggers that sync it.
+
+    The table is an external-content index over appointments keyed by rowid,
+    so it stores only the trigram index, not a second copy of the rows.
+    Returns False when the SQLite build lacks FTS5 or the trigram tokenizer.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'appointments_search'"
+    ).fetchone()
     try:
-        cursor.execute("ALTER TABLE appointments ADD COLUMN booking_code TEXT NOT NULL DEFAULT ''")
-    except sqlite3.OperationalError:
-        # Column already exists
-        pass
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS appointments_search USING fts5(
+                name, last_name, phone,
+                content = 'appointments', content_rowid = 'rowid',
+                tokenize = 'trigram'
+            )
+            """
+        )
+    except sqlite3.OperationalError as e:
+        print(f"Search index unavailable, falling back to LIKE: {e}")
+        return False
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS appointments_search_ai AFTER INSERT ON appointments BEGIN
+            INSERT INTO appointments_search (rowid, name, last_name, phone)
+            VALUES (new.rowid, new.name, new.last_name, new.phone);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS appointments_search_ad AFTER DELETE ON appointments BEGIN
+            INSERT INTO appointments_search (appointments_search, rowid, name, last_name, phone)
+            VALUES ('delete', old.rowid, old.name, old.last_name, old.phone);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS appointments_search_au
+        AFTER UPDATE OF name, last_name, phone ON appointments BEGIN
+            INSERT INTO appointments_search (appointments_search, rowid, name, last_name, phone)
+            VALUES ('delete', old.rowid, old.name, old.last_name, old.phone);
+            INSERT INTO appointments_search (rowid, name, last_name, phone)
+            VALUES (new.rowid, new.name, new.last_name, new.phone);
+        END
+        """
+    )
+    if not exists or rebuild:
+        conn.execute(
+            "INSERT INTO appointments_search (appointments_search) VALUES ('rebuild')"
+        )
+    return True
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _migration_1_base_schema(conn: sqlite3.Connection):
+    """Creates the base schema and brings pre-versioning databases up to it."""
+    # Databases from before user_version may still have the old columns.
+    columns = _columns(conn, "appointments")
+    if "service" in columns:
+        conn.execute("ALTER TABLE appointments DROP COLUMN service")
+    if columns and "last_name" not in columns:
+        conn.execute("ALTER TABLE appointments ADD COLUMN last_name TEXT NOT NULL DEFAULT ''")
+    if columns and "booking_code" not in columns:
+        conn.execute("ALTER TABLE appointments ADD COLUMN booking_code TEXT NOT NULL DEFAULT ''")
 
-    cursor.execute(
+    conn.execute(
         """
         CREATE TABLE IF NOT EXISTS appointments (
             id TEXT PRIMARY KEY,
@@ -84,7 +482,7 @@ def init_db():
         )
         """
     )
-    cursor.execute(
+    conn.execute(
         """
         CREATE TABLE IF NOT EXISTS barbers (
             id TEXT PRIMARY KEY,
@@ -92,7 +490,7 @@ def init_db():
         )
         """
     )
-    cursor.execute(
+    conn.execute(
         """
         CREATE TABLE IF NOT EXISTS services (
             id TEXT PRIMARY KEY,
@@ -101,7 +499,7 @@ def init_db():
         )
         """
     )
-    cursor.execute(
+    conn.execute(
         """
         CREATE TABLE IF NOT EXISTS barber_availability (
             id TEXT PRIMARY KEY,
@@ -114,7 +512,7 @@ def init_db():
         """
     )
     # New table for many-to-many relationship between appointments and services
-    cursor.execute(
+    conn.execute(
         """
         CREATE TABLE IF NOT EXISTS appointment_services (
             id TEXT PRIMARY KEY,
@@ -124,45 +522,689 @@ def init_db():
         )
         """
     )
-    conn.commit()
-    conn.close()
+    # Recurring weekly availability per barber; weekday 0 is Monday
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS availability_templates (
+            barber_id TEXT NOT NULL,
+            weekday INTEGER NOT NULL,
+            time TEXT NOT NULL,
+            PRIMARY KEY (barber_id, weekday, time),
+            FOREIGN KEY (barber_id) REFERENCES barbers (id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """
+    )
+    # Days off and holidays that override the weekly template
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS availability_exceptions (
+            barber_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            reason TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (barber_id, date),
+            FOREIGN KEY (barber_id) REFERENCES barbers (id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """
+    )
+    # Lease that elects a single worker to run background maintenance
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS maintenance_lease (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        """
+    )
+
+
+def _migration_2_appointment_service_ids(conn: sqlite3.Connection):
+    """Rebuilds appointment_services around integer rowids and service ids.
+
+    Line items used to carry a UUID text key and the service name; now they
+    reference services by id, so renames no longer orphan them, and they
+    keep the price paid at booking time.
+
+    Every line item is carried across. One whose service was renamed or
+    deleted before this migration has no id to point at: it keeps its name
+    in service_name, with a NULL service_id and a price of 0, since the
+    price it was booked at was never recorded.
+    """
+    conn.execute(
+        """
+        CREATE TABLE appointment_services_v2 (
+            id INTEGER PRIMARY KEY,
+            appointment_id TEXT NOT NULL,
+            service_id TEXT,
+            price INTEGER NOT NULL,
+            service_name TEXT,
+            FOREIGN KEY (appointment_id) REFERENCES appointments (id) ON DELETE CASCADE,
+            FOREIGN KEY (service_id) REFERENCES services (id) ON DELETE RESTRICT
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO appointment_services_v2 (appointment_id, service_id, price, service_name)
+        SELECT
+            s.appointment_id,
+            sv.id,
+            COALESCE(sv.price, 0),
+            CASE WHEN sv.id IS NULL THEN s.service_name END
+        FROM appointment_services AS s
+        LEFT JOIN services AS sv ON sv.name = s.service_name
+        ORDER BY s.rowid
+        """
+    )
+    unmatched = conn.execute(
+        "SELECT COUNT(*) FROM appointment_services_v2 WHERE service_id IS NULL"
+    ).fetchone()[0]
+    if unmatched:
+        print(f"Kept {unmatched} appointment services with no matching service by name")
+    conn.execute("DROP TABLE appointment_services")
+    conn.execute("ALTER TABLE appointment_services_v2 RENAME TO appointment_services")
+
+
+def _migration_3_start_minute(conn: sqlite3.Connection):
+    """Adds appointments.start_minute, the slot start in minutes since the epoch.
+
+    The text date and time are kept for display; writers fill start_minute
+    alongside them (see slot_minute). Times are local wall-clock times,
+    encoded as if they were UTC. Availability slots are looked up by
+    barber, date and time, so they do not need the column.
+    """
+    conn.execute("ALTER TABLE appointments ADD COLUMN start_minute INTEGER")
+    conn.execute(
+        """
+        UPDATE appointments
+        SET start_minute = CAST(strftime('%s', date || ' ' || time) AS INTEGER) / 60
+        """
+    )
+
+
+def _migration_4_appointments_archive(conn: sqlite3.Connection):
+    """Adds the archive that past appointments are moved to.
+
+    Rows are self-contained: services are frozen as [name, price] pairs and
+    their total, so reports never join back into the live tables.
+    """
+    conn.execute(
+        """
+        CREATE TABLE appointments_archive (
+            id INTEGER PRIMARY KEY,
+            appointment_id TEXT NOT NULL,
+            month TEXT NOT NULL,
+            date TEXT NOT NULL,
+            time TEXT NOT NULL,
+            start_minute INTEGER,
+            barber TEXT NOT NULL,
+            name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            booking_code TEXT NOT NULL,
+            services TEXT NOT NULL,
+            total_price INTEGER NOT NULL
+        )
+        """
+    )
+
+
+def _migration_5_free_slots(conn: sqlite3.Connection):
+    """Adds free_slots, availability minus bookings, kept current by triggers.
+
+    The triggers run inside the writing transaction, so the table can never
+    disagree with barber_availability and appointments, however writes
+    interleave. Bookings reference barbers by name, hence the joins on it.
+    Slots and appointments are only ever inserted and deleted, not updated
+    in place; renaming a barber renames their bookings, which keeps every
+    booking matched to its slot.
+    """
+    conn.execute(
+        """
+        CREATE TABLE free_slots (
+            barber_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            time TEXT NOT NULL,
+            PRIMARY KEY (barber_id, date, time)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO free_slots (barber_id, date, time)
+        SELECT ba.barber_id, ba.date, ba.time
+        FROM barber_availability AS ba
+        JOIN barbers AS b ON b.id = ba.barber_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM appointments AS a
+            WHERE a.barber = b.name AND a.date = ba.date AND a.time = ba.time
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER free_slots_availability_ai AFTER INSERT ON barber_availability BEGIN
+            INSERT OR IGNORE INTO free_slots (barber_id, date, time)
+            SELECT new.barber_id, new.date, new.time
+            FROM barbers AS b
+            WHERE b.id = new.barber_id AND NOT EXISTS (
+                SELECT 1 FROM appointments AS a
+                WHERE a.barber = b.name AND a.date = new.date AND a.time = new.time
+            );
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER free_slots_availability_ad AFTER DELETE ON barber_availability BEGIN
+            DELETE FROM free_slots
+            WHERE barber_id = old.barber_id AND date = old.date AND time = old.time;
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER free_slots_appointments_ai AFTER INSERT ON appointments BEGIN
+            DELETE FROM free_slots
+            WHERE barber_id = (SELECT id FROM barbers WHERE name = new.barber)
+            AND date = new.date AND time = new.time;
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER free_slots_appointments_ad AFTER DELETE ON appointments BEGIN
+            INSERT OR IGNORE INTO free_slots (barber_id, date, time)
+            SELECT ba.barber_id, ba.date, ba.time
+            FROM barber_availability AS ba
+            WHERE ba.barber_id = (SELECT id FROM barbers WHERE name = old.barber)
+            AND ba.date = old.date AND ba.time = old.time;
+        END
+        """
+    )
+    # Bookings follow a renamed barber, so free_slots needs no rebuild.
+    conn.execute(
+        """
+        CREATE TRIGGER free_slots_barbers_au AFTER UPDATE OF name ON barbers BEGIN
+            UPDATE appointments SET barber = new.name WHERE barber = old.name;
+        END
+        """
+    )
+
+
+def _migration_6_unique_booking_codes(conn: sqlite3.Connection):
+    """Re-codes appointments that share a booking code with an older one.
+
+    Legacy databases may hold duplicate codes, which keep
+    idx_appointments_code from being built. The oldest appointment keeps
+    its code; the others get a fresh one.
+    """
+    duplicates = conn.execute(
+        """
+        SELECT id FROM (
+            SELECT
+                id,
+                rowid AS row,
+                ROW_NUMBER() OVER (PARTITION BY booking_code ORDER BY rowid) AS n
+            FROM appointments
+            WHERE booking_code <> ''
+        )
+        WHERE n > 1
+        ORDER BY row
+        """
+    ).fetchall()
+    for (appointment_id,) in duplicates:
+        conn.execute(
+            "UPDATE appointments SET booking_code = ? WHERE id = ?",
+            (_draw_booking_code(conn), appointment_id),
+        )
+    if duplicates:
+        print(f"Re-coded {len(duplicates)} appointments with a duplicate booking code")
+
+
+def _migration_7_appointment_conflicts(conn: sqlite3.Connection):
+    """Moves double bookings out of appointments, into appointment_conflicts.
+
+    Legacy databases may hold several appointments for one barber, date and
+    time, which keep idx_appointments_slot from being built. The oldest
+    keeps the slot; the others are kept here, frozen like archive rows and
+    pointing at the appointment that kept the slot, for staff to rebook.
+    """
+    conn.execute(
+        """
+        CREATE TABLE appointment_conflicts (
+            id INTEGER PRIMARY KEY,
+            appointment_id TEXT NOT NULL,
+            kept_appointment_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            time TEXT NOT NULL,
+            barber TEXT NOT NULL,
+            name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            booking_code TEXT NOT NULL,
+            services TEXT NOT NULL
+        )
+        """
+    )
+    moved = conn.execute(
+        """
+        INSERT INTO appointment_conflicts (
+            appointment_id, kept_appointment_id, date, time, barber,
+            name, last_name, phone, booking_code, services
+        )
+        SELECT
+            a.id, d.kept, a.date, a.time, a.barber,
+            a.name, a.last_name, a.phone, a.booking_code,
+            (
+                SELECT json_group_array(json_array(COALESCE(sv.name, s.service_name), s.price))
+                FROM appointment_services AS s
+                LEFT JOIN services AS sv ON sv.id = s.service_id
+                WHERE s.appointment_id = a.id
+            )
+        FROM (
+            SELECT
+                id,
+                rowid AS row,
+                ROW_NUMBER() OVER slot AS n,
+                FIRST_VALUE(id) OVER slot AS kept
+            FROM appointments
+            WINDOW slot AS (PARTITION BY barber, date, time ORDER BY rowid)
+        ) AS d
+        JOIN appointments AS a ON a.id = d.id
+        WHERE d.n > 1
+        ORDER BY d.row
+        """
+    ).rowcount
+    if not moved:
+        return
+    # Line items go with their appointment through ON DELETE CASCADE.
+    conn.execute(
+        """
+        DELETE FROM appointments
+        WHERE id IN (SELECT appointment_id FROM appointment_conflicts)
+        """
+    )
+    # The delete trigger offers each slot again, though the kept booking holds it.
+    conn.execute(
+        """
+        DELETE FROM free_slots
+        WHERE EXISTS (
+            SELECT 1 FROM appointments AS a
+            JOIN barbers AS b ON b.name = a.barber
+            WHERE b.id = free_slots.barber_id
+            AND a.date = free_slots.date AND a.time = free_slots.time
+        )
+        """
+    )
+    for row in conn.execute(
+        "SELECT appointment_id, kept_appointment_id, barber, date, time FROM appointment_conflicts"
+    ):
+        print(
+            f"Moved appointment {row[0]} to appointment_conflicts: "
+            f"{row[2]} {row[3]} {row[4]} is held by {row[1]}"
+        )
+
+
+# Schema changes, applied in order. A database's PRAGMA user_version is the
+# number of steps it has already run; append new steps, never edit old ones.
+# Indexes and the search index are reconciled after the steps run.
+_MIGRATIONS: list[Callable[[sqlite3.Connection], None]] = [
+    _migration_1_base_schema,
+    _migration_2_appointment_service_ids,
+    _migration_3_start_minute,
+    _migration_4_appointments_archive,
+    _migration_5_free_slots,
+    _migration_6_unique_booking_codes,
+    _migration_7_appointment_conflicts,
+]
+SCHEMA_VERSION = len(_MIGRATIONS)
+
+
+def migrate(conn: sqlite3.Connection, rebuild_search: bool = False) -> int:
+    """Applies pending migrations and returns how many ran.
+
+    Runs in one BEGIN IMMEDIATE transaction, so concurrent workers starting
+    at once apply each step exactly once.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for step in _MIGRATIONS[version:]:
+            step(conn)
+        pending = SCHEMA_VERSION - version
+        if pending > 0:
+            ensure_indexes(conn)
+            # VACUUM may renumber appointment rowids, which the search index keys on.
+            _ensure_search_index(conn, rebuild=rebuild_search)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return max(pending, 0)
+
+
+def _probe_search_index(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("SELECT 1 FROM appointments_search LIMIT 0")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def init_db():
+    """Brings the database schema up to date.
+
+    When the schema is already current this only reads PRAGMA user_version
+    and issues no DDL, so workers starting up take no write locks.
+    """
+    global _search_index_available
+    with get_db_connection() as conn:
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            _search_index_available = _probe_search_index(conn)
+            return
+        # The journal mode is persistent, so this only has to be set once per file.
+        conn.execute(f"PRAGMA journal_mode = {DB_JOURNAL_MODE}")
+        # Incremental auto-vacuum lets maintenance reclaim free pages in small
+        # steps. Switching an existing file over needs a one-time VACUUM.
+        vacuumed = False
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            vacuumed = True
+        applied = migrate(conn, rebuild_search=vacuumed)
+        if applied:
+            print(f"Applied {applied} database migration(s); schema version {SCHEMA_VERSION}")
+        _search_index_available = _probe_search_index(conn)
+
+
+# Shared by every appointment-reading query: services come back already
+# attached to their appointment as a JSON array of [name, price] pairs, in
+# one round trip.
+_APPOINTMENT_SELECT = """
+    SELECT
+        a.id, a.name, a.last_name, a.phone, a.date, a.time, a.barber, a.booking_code,
+        (
+            SELECT json_group_array(json_array(COALESCE(sv.name, s.service_name), s.price))
+            FROM appointment_services AS s
+            LEFT JOIN services AS sv ON sv.id = s.service_id
+            WHERE s.appointment_id = a.id
+        ) AS services
+    FROM appointments AS a
+"""
+
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_MINUTES_PER_DAY = 24 * 60
+
+
+def epoch_minute(moment: datetime.datetime) -> int:
+    """Encodes a naive local datetime the way the start_minute column does."""
+    return (moment - _EPOCH) // datetime.timedelta(minutes=1)
+
+
+def slot_minute(date: str, slot: str) -> int:
+    """Encodes a 'YYYY-MM-DD' date and 'HH:MM' time as a start_minute."""
+    days = datetime.date.fromisoformat(date).toordinal() - _EPOCH_ORDINAL
+    hours, minutes = slot.split(":")
+    return days * _MINUTES_PER_DAY + int(hours) * 60 + int(minutes)
+
+
+def _row_to_appointment(row: sqlite3.Row) -> Appointment:
+    appointment = dict(row)
+    items = json.loads(row["services"])
+    appointment["services"] = [name for name, _ in items]
+    appointment["service_prices"] = [price for _, price in items]
+    return Appointment(**appointment)
+
+
+def _like_pattern(term: str) -> str:
+    """Builds a LIKE pattern matching `term` anywhere, with wildcards escaped."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _search_match(columns: str, term: str) -> str:
+    """Builds an FTS5 query matching `term` as a substring of the given columns."""
+    return f'{{{columns}}} : "{term.replace(chr(34), chr(34) * 2)}"'
+
+
+def get_appointments_page(
+    after: Optional[Appointment] = None,
+    limit: int = APPOINTMENTS_PAGE_SIZE,
+    name: str = "",
+    phone: str = "",
+    service: str = "",
+    date: str = "",
+) -> list[Appointment]:
+    """Returns the page of matching appointments that follows `after`.
+
+    Pages are ordered by (start_minute, id) and located with a keyset
+    condition on the last appointment of the previous page, so fetching a
+    page costs the same no matter how deep into the book it is. The optional
+    filters are applied in SQL: name matches first or last name and phone
+    matches any part of the number, both case-insensitively, through the
+    trigram search index when available; service and date must match exactly.
+    """
+    conditions = []
+    params: list = []
+    if after is not None:
+        conditions.append("(a.start_minute, a.id) > (?, ?)")
+        params += [slot_minute(after["date"], after["time"]), after["id"]]
+    use_search_index = _search_index_available
+    if name and use_search_index and len(name) >= _TRIGRAM_MIN_LENGTH:
+        conditions.append(
+            "a.rowid IN (SELECT rowid FROM appointments_search WHERE appointments_search MATCH ?)"
+        )
+        params.append(_search_match("name last_name", name))
+    elif name:
+        conditions.append(
+            "(a.name LIKE ? ESCAPE '\\' OR a.last_name LIKE ? ESCAPE '\\')"
+        )
+        params += [_like_pattern(name), _like_pattern(name)]
+    if phone and use_search_index and len(phone) >= _TRIGRAM_MIN_LENGTH:
+        conditions.append(
+            "a.rowid IN (SELECT rowid FROM appointments_search WHERE appointments_search MATCH ?)"
+        )
+        params.append(_search_match("phone", phone))
+    elif phone:
+        conditions.append("a.phone LIKE ? ESCAPE '\\'")
+        params.append(_like_pattern(phone))
+    if service:
+        conditions.append(
+            """EXISTS (
+                SELECT 1 FROM appointment_services AS s
+                WHERE s.appointment_id = a.id
+                AND s.service_id = (SELECT id FROM services WHERE name = ?)
+            )"""
+        )
+        params.append(service)
+    if date:
+        day_start = slot_minute(date, "00:00")
+        conditions.append("a.start_minute >= ? AND a.start_minute < ?")
+        params += [day_start, day_start + _MINUTES_PER_DAY]
+    sql = _APPOINTMENT_SELECT
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY a.start_minute, a.id LIMIT ?"
+    params.append(limit)
+    with get_db_connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [_row_to_appointment(row) for row in rows]
+
+
+def slot_mask(times) -> int:
+    """Packs times into a mask over SLOT_TIMES, ignoring unknown ones."""
+    mask = 0
+    for slot in times:
+        mask |= _SLOT_BITS.get(slot, 0)
+    return mask
+
+
+def mask_times(mask: int) -> list[str]:
+    """Unpacks a mask over SLOT_TIMES into its times, in order."""
+    return [slot for i, slot in enumerate(SLOT_TIMES) if mask >> i & 1]
+
+
+def add_months(day: datetime.date, delta: int) -> datetime.date:
+    """The first day of the month delta months away from day's month."""
+    months = day.year * 12 + day.month - 1 + delta
+    return datetime.date(months // 12, months % 12 + 1, 1)
+
+
+def month_key(day: datetime.date) -> str:
+    """The 'YYYY-MM' month containing day."""
+    return day.strftime("%Y-%m")
+
+
+def _month_bounds(month: str) -> tuple[str, str]:
+    """First day of a 'YYYY-MM' month and first day of the next one."""
+    first = datetime.date.fromisoformat(f"{month}-01")
+    following = (first + datetime.timedelta(days=32)).replace(day=1)
+    return first.isoformat(), following.isoformat()
+
+
+def _load_month_masks(table: str, barber_id: str, month: str) -> dict[str, int]:
+    """Slot masks by date for one barber over a 'YYYY-MM' month of table.
+
+    Both free_slots and barber_availability are keyed by (barber_id, date,
+    time), so this is one index range scan.
+    """
+    start, end = _month_bounds(month)
+    masks: dict[str, int] = {}
+    with get_db_connection() as conn:
+        for row in conn.execute(
+            f"SELECT date, time FROM {table} WHERE barber_id = ? AND date >= ? AND date < ?",
+            (barber_id, start, end),
+        ):
+            bit = _SLOT_BITS.get(row["time"])
+            if bit:
+                masks[row["date"]] = masks.get(row["date"], 0) | bit
+    return masks
+
+
+def get_month_slots(barber_id: str, month: str) -> dict[str, int]:
+    """Free slot masks by date for a barber over a 'YYYY-MM' month.
+
+    The whole month is read in one primary-key range scan of free_slots and
+    cached until a booking or availability change for the barber touches it.
+    Dates without a free slot are left out.
+    """
+    return cache.cached_availability(
+        barber_id, month, lambda: _load_month_masks("free_slots", barber_id, month)
+    )
+
+
+def get_open_times(
+    barber_id: str, date: str, now: Optional[datetime.datetime] = None
+) -> list[str]:
+    """Times a barber offers on a date that are neither booked nor past."""
+    if now is None:
+        now = datetime.datetime.now()
+    mask = get_month_slots(barber_id, date[:7]).get(date, 0)
+    now_minute = epoch_minute(now)
+    if slot_minute(date, SLOT_TIMES[0]) <= now_minute:
+        mask &= ~slot_mask(
+            slot for slot in SLOT_TIMES if slot_minute(date, slot) <= now_minute
+        )
+    return mask_times(mask)
+
+
+def days_mask(masks: dict[str, int]) -> int:
+    """Folds slot masks by date into a mask of days; bit d - 1 is day d."""
+    days = 0
+    for date, mask in masks.items():
+        if mask:
+            days |= 1 << (int(date[8:]) - 1)
+    return days
+
+
+def get_open_days(month: str) -> int:
+    """Days of a 'YYYY-MM' month on which any barber has a free slot."""
+    days = 0
+    for barber in get_all_barbers():
+        days |= days_mask(get_month_slots(barber["id"], month))
+    return days
+
+
+# Random draws before giving up; with the default code space a single
+# draw almost never collides, so the expected cost is one lookup.
+_BOOKING_CODE_ATTEMPTS = 16
+
+
+def generate_booking_code() -> str:
+    return "".join(
+        secrets.choice(BOOKING_CODE_ALPHABET) for _ in range(BOOKING_CODE_LENGTH)
+    )
+
+
+def normalize_booking_code(code: str) -> str:
+    """Normalizes a booking code typed by a customer."""
+    code = code.strip()
+    return code.upper() if BOOKING_CODE_ALPHABET.isupper() else code
+
+
+def _booking_code_taken(conn: sqlite3.Connection, code: str) -> bool:
+    return (
+        conn.execute(
+            "SELECT 1 FROM appointments WHERE booking_code = ? AND booking_code <> ''",
+            (code,),
+        ).fetchone()
+        is not None
+    )
+
+
+def _draw_booking_code(conn: sqlite3.Connection) -> str:
+    for _ in range(_BOOKING_CODE_ATTEMPTS):
+        code = generate_booking_code()
+        if not _booking_code_taken(conn, code):
+            return code
+    raise RuntimeError("Could not allocate a unique booking code")
+
 
+def allocate_booking_code() -> str:
+    """Returns a booking code not used by any stored appointment.
 
-def get_all_appointments() -> list[Appointment]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    # Get all appointments
-    cursor.execute("SELECT * FROM appointments")
-    appointments_rows = cursor.fetchall()
-    
-    appointments_dict = {row["id"]: dict(row) for row in appointments_rows}
-    for app_id in appointments_dict:
-        appointments_dict[app_id]['services'] = []
+    The code is only reserved once the appointment is written;
+    add_appointment_db draws a new one if it was taken in the meantime.
+    """
+    with get_db_connection() as conn:
+        return _draw_booking_code(conn)
 
-    # Get all service associations
-    cursor.execute("""
-        SELECT appointment_id, service_name 
-        FROM appointment_services
-    """)
-    services_rows = cursor.fetchall()
-    
-    for row in services_rows:
-        app_id = row['appointment_id']
-        if app_id in appointments_dict:
-            appointments_dict[app_id]['services'].append(row['service_name'])
 
-    conn.close()
-    return [Appointment(**app_data) for app_data in appointments_dict.values()]
+# Outcomes of add_appointment_db
+BOOKING_OK = "ok"
+BOOKING_SLOT_TAKEN = "slot_taken"
+BOOKING_ERROR = "error"
 
 
-def add_appointment_db(appointment: Appointment):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def _add_appointment_tx(
+    conn: sqlite3.Connection, appointment: Appointment
+) -> tuple[str, str, Optional[str]]:
+    """Returns the outcome, the stored booking code and the barber's id."""
+    barber = conn.execute(
+        "SELECT id FROM barbers WHERE name = ?", (appointment["barber"],)
+    ).fetchone()
+    if not barber:
+        return BOOKING_SLOT_TAKEN, "", None
+    barber_id = barber["id"]
+    # The writer holds BEGIN IMMEDIATE, so nothing can claim the slot between
+    # this check and the insert; idx_appointments_slot backs it up.
+    slot_free = conn.execute(
+        "SELECT 1 FROM free_slots WHERE barber_id = ? AND date = ? AND time = ?",
+        (barber_id, appointment["date"], appointment["time"]),
+    ).fetchone()
+    if not slot_free:
+        return BOOKING_SLOT_TAKEN, "", barber_id
+    booking_code = appointment["booking_code"]
+    if not booking_code or _booking_code_taken(conn, booking_code):
+        booking_code = _draw_booking_code(conn)
+    # Insert into appointments table
     try:
-        cursor.execute("BEGIN")
-        # Insert into appointments table
-        cursor.execute(
-            "INSERT INTO appointments (id, name, last_name, phone, date, time, barber, booking_code) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        conn.execute(
+            "INSERT INTO appointments (id, name, last_name, phone, date, time, start_minute, barber, booking_code) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
             (
                 appointment["id"],
                 appointment["name"],
@@ -170,207 +1212,515 @@ def add_appointment_db(appointment: Appointment):
                 appointment["phone"],
                 appointment["date"],
                 appointment["time"],
+                slot_minute(appointment["date"], appointment["time"]),
                 appointment["barber"],
-                appointment["booking_code"],
+                booking_code,
             ),
         )
-        # Insert into appointment_services table for each service
-        for service_name in appointment["services"]:
-            cursor.execute(
-                "INSERT INTO appointment_services (id, appointment_id, service_name) VALUES (?, ?, ?)",
-                (str(uuid.uuid4()), appointment["id"], service_name),
-            )
-        conn.commit()
+    except sqlite3.IntegrityError as e:
+        # Only the failed statement is undone; nothing else was written yet.
+        if "appointments.barber" in str(e):
+            return BOOKING_SLOT_TAKEN, "", barber_id
+        raise
+    # One line item per service, priced at the current service price
+    services = list(dict.fromkeys(appointment["services"]))
+    inserted = conn.execute(
+        """
+        INSERT INTO appointment_services (appointment_id, service_id, price)
+        SELECT ?, id, price FROM services
+        WHERE name IN (SELECT value FROM json_each(?))
+        """,
+        (appointment["id"], json.dumps(services)),
+    ).rowcount
+    if inserted != len(services):
+        raise ValueError("Appointment references a service that no longer exists")
+    return BOOKING_OK, booking_code, barber_id
+
+
+def add_appointment_db(appointment: Appointment) -> tuple[str, str]:
+    """Books the appointment's slot atomically.
+
+    Returns the outcome and the booking code actually stored, which
+    differs from appointment["booking_code"] if another booking took that
+    code in the meantime. The outcome is BOOKING_OK, BOOKING_SLOT_TAKEN
+    when the slot is no longer offered or someone else booked it first,
+    or BOOKING_ERROR.
+    """
+    try:
+        result, booking_code, barber_id = run_write(_add_appointment_tx, appointment)
+        # Also on a conflict: this worker's cached view was evidently stale.
+        if barber_id:
+            cache.invalidate_availability(barber_id, appointment["date"])
+        return result, booking_code
     except Exception as e:
-        conn.rollback()
         print(f"Database error in add_appointment_db: {e}")
-    finally:
-        conn.close()
+        return BOOKING_ERROR, ""
 
 
-def delete_appointment_db(appointment_id: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def _delete_appointment_tx(
+    conn: sqlite3.Connection, appointment_id: str
+) -> Optional[tuple[str, str]]:
+    """Returns the freed slot's barber id and date, if it belonged to a barber."""
     # The ON DELETE CASCADE foreign key will handle deleting from appointment_services
-    cursor.execute(
-        "DELETE FROM appointments WHERE id = ?",
+    row = conn.execute(
+        "DELETE FROM appointments WHERE id = ? RETURNING barber, date",
         (appointment_id,),
+    ).fetchone()
+    if not row:
+        return None
+    barber = conn.execute(
+        "SELECT id FROM barbers WHERE name = ?", (row["barber"],)
+    ).fetchone()
+    return (barber["id"], row["date"]) if barber else None
+
+
+def delete_appointment_db(appointment_id: str):
+    freed = run_write(_delete_appointment_tx, appointment_id)
+    if freed:
+        cache.invalidate_availability(*freed)
+
+
+def _archive_batch_tx(conn: sqlite3.Connection, cutoff: int, limit: int) -> int:
+    moved = conn.execute(
+        """
+        INSERT INTO appointments_archive (
+            appointment_id, month, date, time, start_minute, barber,
+            name, last_name, phone, booking_code, services, total_price
+        )
+        SELECT
+            a.id, substr(a.date, 1, 7), a.date, a.time, a.start_minute, a.barber,
+            a.name, a.last_name, a.phone, a.booking_code,
+            (
+                SELECT json_group_array(json_array(COALESCE(sv.name, s.service_name), s.price))
+                FROM appointment_services AS s
+                LEFT JOIN services AS sv ON sv.id = s.service_id
+                WHERE s.appointment_id = a.id
+            ),
+            (
+                SELECT COALESCE(SUM(s.price), 0)
+                FROM appointment_services AS s
+                WHERE s.appointment_id = a.id
+            )
+        FROM appointments AS a
+        WHERE a.start_minute < ?
+        ORDER BY a.start_minute, a.id
+        LIMIT ?
+        """,
+        (cutoff, limit),
+    ).rowcount
+    if not moved:
+        return 0
+    # The batch is a prefix of idx_appointments_start, so it can be deleted
+    # as one index range up to the last archived row. Line items go with
+    # their appointment through ON DELETE CASCADE.
+    last_minute, last_id = conn.execute(
+        "SELECT start_minute, appointment_id FROM appointments_archive ORDER BY id DESC LIMIT 1"
+    ).fetchone()
+    conn.execute(
+        "DELETE FROM appointments WHERE (start_minute, id) <= (?, ?)",
+        (last_minute, last_id),
     )
-    conn.commit()
-    conn.close()
+    return moved
 
 
-def get_appointment_by_code(code: str) -> Optional[Appointment]:
-    """Fetches a single appointment by its unique booking code."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM appointments WHERE booking_code = ?", (code,))
-    appointment_row = cursor.fetchone()
+def archive_past_appointments_db(
+    cutoff: Optional[datetime.datetime] = None,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+) -> int:
+    """Moves every appointment that starts before the cutoff (default: now)
+    into appointments_archive and returns how many were moved.
 
-    if not appointment_row:
-        conn.close()
-        return None
+    Appointments move in batches of batch_size, each copied and deleted in
+    one transaction, so a large backlog never holds the write lock for long.
+    """
+    if cutoff is None:
+        cutoff = datetime.datetime.now()
+    cutoff_minute = epoch_minute(cutoff)
+    total = 0
+    try:
+        while True:
+            moved = run_write(_archive_batch_tx, cutoff_minute, batch_size)
+            total += moved
+            if moved < batch_size:
+                break
+        if total:
+            cache.invalidate_availability()
+        if total and _search_index_available:
+            # Deletes leave tombstones in the search index that slow every
+            # MATCH until merged; the live table is small, so this is cheap.
+            run_write(
+                lambda conn: conn.execute(
+                    "INSERT INTO appointments_search (appointments_search) VALUES ('optimize')"
+                )
+            )
+    except Exception as e:
+        print(f"Database error in archive_past_appointments_db: {e}")
+    return total
 
-    appointment_dict = dict(appointment_row)
-    appointment_dict['services'] = []
 
-    # Get associated services
-    cursor.execute(
-        "SELECT service_name FROM appointment_services WHERE appointment_id = ?",
-        (appointment_dict["id"],),
-    )
-    services_rows = cursor.fetchall()
-    for row in services_rows:
-        appointment_dict['services'].append(row['service_name'])
+def get_archive_summary(month: str) -> list[ArchiveSummary]:
+    """Per-barber appointment count and revenue for a 'YYYY-MM' month."""
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT barber, COUNT(*) AS appointments, SUM(total_price) AS revenue
+            FROM appointments_archive
+            WHERE month = ?
+            GROUP BY barber
+            ORDER BY barber
+            """,
+            (month,),
+        ).fetchall()
+    return [ArchiveSummary(**dict(row)) for row in rows]
+
+
+def get_appointment_by_code(code: str) -> Optional[Appointment]:
+    """Fetches a single appointment by its unique booking code."""
+    with get_db_connection() as conn:
+        row = conn.execute(
+            _APPOINTMENT_SELECT
+            + " WHERE a.booking_code = ? AND a.booking_code <> ''",
+            (code,),
+        ).fetchone()
+    return _row_to_appointment(row) if row else None
+
 
-    conn.close()
-    return Appointment(**appointment_dict)
+def _load_barbers() -> list[dict]:
+    with get_db_connection() as conn:
+        rows = conn.execute("SELECT * FROM barbers ORDER BY name").fetchall()
+    return [dict(row) for row in rows]
 
 
 def get_all_barbers() -> list[Barber]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM barbers ORDER BY name")
-    rows = cursor.fetchall()
-    conn.close()
-    return [Barber(**dict(row)) for row in rows]
+    # Copies, so callers can't mutate the shared cached rows.
+    return [Barber(**row) for row in cache.cached("barbers", _load_barbers)]
 
 
 def add_barber_db(barber: Barber):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO barbers (id, name) VALUES (?, ?)",
-        (barber["id"], barber["name"]),
+    run_write(
+        lambda conn: conn.execute(
+            "INSERT INTO barbers (id, name) VALUES (?, ?)",
+            (barber["id"], barber["name"]),
+        )
     )
-    conn.commit()
-    conn.close()
+    cache.invalidate("barbers")
 
 
 def update_barber_db(barber_id: str, new_name: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE barbers SET name = ? WHERE id = ?",
-        (new_name, barber_id),
+    run_write(
+        lambda conn: conn.execute(
+            "UPDATE barbers SET name = ? WHERE id = ?",
+            (new_name, barber_id),
+        )
     )
-    conn.commit()
-    conn.close()
+    cache.invalidate("barbers")
+    # Bookings are matched to barbers by name; a trigger renames them too.
+    cache.invalidate_availability(barber_id)
 
 
 def delete_barber_db(barber_id: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "DELETE FROM barbers WHERE id = ?", (barber_id,)
+    run_write(
+        lambda conn: conn.execute(
+            "DELETE FROM barbers WHERE id = ?",
+            (barber_id,),
+        )
     )
-    conn.commit()
-    conn.close()
+    cache.invalidate("barbers")
+    cache.invalidate_availability(barber_id)
+
+
+def _load_services() -> list[dict]:
+    with get_db_connection() as conn:
+        rows = conn.execute("SELECT * FROM services ORDER BY name").fetchall()
+    return [dict(row) for row in rows]
 
 
 def get_all_services() -> list[Service]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM services ORDER BY name")
-    rows = cursor.fetchall()
-    conn.close()
-    return [Service(**dict(row)) for row in rows]
+    return [Service(**row) for row in cache.cached("services", _load_services)]
 
 
 def add_service_db(service: Service):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO services (id, name, price) VALUES (?, ?, ?)",
-        (service["id"], service["name"], service["price"]),
+    run_write(
+        lambda conn: conn.execute(
+            "INSERT INTO services (id, name, price) VALUES (?, ?, ?)",
+            (service["id"], service["name"], service["price"]),
+        )
     )
-    conn.commit()
-    conn.close()
+    cache.invalidate("services")
 
 
 def update_service_db(
     service_id: str, new_name: str, new_price: int
 ):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE services SET name = ?, price = ? WHERE id = ?",
-        (new_name, new_price, service_id),
+    run_write(
+        lambda conn: conn.execute(
+            "UPDATE services SET name = ?, price = ? WHERE id = ?",
+            (new_name, new_price, service_id),
+        )
     )
-    conn.commit()
-    conn.close()
+    cache.invalidate("services")
 
 
-def delete_service_db(service_id: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "DELETE FROM services WHERE id = ?", (service_id,)
-    )
-    conn.commit()
-    conn.close()
+def delete_service_db(service_id: str) -> bool:
+    """Deletes a service; returns False while appointments still use it."""
+    try:
+        run_write(
+            lambda conn: conn.execute(
+                "DELETE FROM services WHERE id = ?",
+                (service_id,),
+            )
+        )
+    except sqlite3.IntegrityError:
+        return False
+    cache.invalidate("services")
+    return True
 
 
 def get_availability_for_barber(
     barber_id: str, date: str
 ) -> list[str]:
     """Fetches the available time slots for a specific barber on a specific date."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT time FROM barber_availability WHERE barber_id = ? AND date = ? ORDER BY time",
-        (barber_id, date),
-    )
-    rows = cursor.fetchall()
-    conn.close()
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT time FROM barber_availability WHERE barber_id = ? AND date = ? ORDER BY time",
+            (barber_id, date),
+        ).fetchall()
     return [row["time"] for row in rows]
 
 
+def _set_availability_tx(
+    conn: sqlite3.Connection, barber_id: str, date: str, times: list[str]
+) -> int:
+    current = {
+        row["time"]
+        for row in conn.execute(
+            "SELECT time FROM barber_availability WHERE barber_id = ? AND date = ?",
+            (barber_id, date),
+        )
+    }
+    wanted = set(times)
+    to_delete = sorted(current - wanted)
+    to_insert = sorted(wanted - current)
+    conn.executemany(
+        "DELETE FROM barber_availability WHERE barber_id = ? AND date = ? AND time = ?",
+        [(barber_id, date, slot) for slot in to_delete],
+    )
+    conn.executemany(
+        "INSERT INTO barber_availability (id, barber_id, date, time) VALUES (?, ?, ?, ?)",
+        [(str(uuid.uuid4()), barber_id, date, slot) for slot in to_insert],
+    )
+    return len(to_delete) + len(to_insert)
+
+
 def set_availability_for_barber(
     barber_id: str, date: str, times: list[str]
-):
-    """Sets the available time slots for a barber on a date, overwriting existing ones."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+) -> int:
+    """Sets the available time slots for a barber on a date, overwriting existing ones.
+
+    Only the slots that differ from what is stored are deleted or inserted.
+    Returns the number of rows touched, so saving an unchanged day returns 0.
+    """
     try:
-        cursor.execute("BEGIN")
-        cursor.execute(
-            "DELETE FROM barber_availability WHERE barber_id = ? AND date = ?",
+        changed = run_write(_set_availability_tx, barber_id, date, times)
+    except Exception as e:
+        print(f"Database error: {e}")
+        return 0
+    if changed:
+        cache.invalidate_availability(barber_id, date)
+    return changed
+
+# Longest date range a weekly template can be expanded over in one call.
+MAX_TEMPLATE_RANGE_DAYS = 366
+
+
+def get_weekly_template(barber_id: str) -> list[list[str]]:
+    """Returns the barber's template as seven lists of times, Monday first."""
+    template: list[list[str]] = [[] for _ in range(7)]
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT weekday, time FROM availability_templates WHERE barber_id = ? ORDER BY weekday, time",
+            (barber_id,),
+        ).fetchall()
+    for row in rows:
+        template[row["weekday"]].append(row["time"])
+    return template
+
+
+def _set_template_day_tx(
+    conn: sqlite3.Connection, barber_id: str, weekday: int, times: list[str]
+) -> int:
+    current = {
+        row["time"]
+        for row in conn.execute(
+            "SELECT time FROM availability_templates WHERE barber_id = ? AND weekday = ?",
+            (barber_id, weekday),
+        )
+    }
+    wanted = set(times)
+    to_delete = sorted(current - wanted)
+    to_insert = sorted(wanted - current)
+    conn.executemany(
+        "DELETE FROM availability_templates WHERE barber_id = ? AND weekday = ? AND time = ?",
+        [(barber_id, weekday, slot) for slot in to_delete],
+    )
+    conn.executemany(
+        "INSERT INTO availability_templates (barber_id, weekday, time) VALUES (?, ?, ?)",
+        [(barber_id, weekday, slot) for slot in to_insert],
+    )
+    return len(to_delete) + len(to_insert)
+
+
+def set_weekly_template_day(barber_id: str, weekday: int, times: list[str]) -> int:
+    """Sets the template times for one weekday and returns the rows touched."""
+    return run_write(_set_template_day_tx, barber_id, weekday, times)
+
+
+def get_availability_exceptions(barber_id: str) -> list[AvailabilityException]:
+    """Fetches the barber's upcoming days off, soonest first."""
+    today_str = datetime.date.today().strftime("%Y-%m-%d")
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT date, reason FROM availability_exceptions WHERE barber_id = ? AND date >= ? ORDER BY date",
+            (barber_id, today_str),
+        ).fetchall()
+    return [AvailabilityException(**dict(row)) for row in rows]
+
+
+def _add_exception_tx(
+    conn: sqlite3.Connection, barber_id: str, date: str, reason: str
+):
+    conn.execute(
+        """
+        INSERT INTO availability_exceptions (barber_id, date, reason) VALUES (?, ?, ?)
+        ON CONFLICT (barber_id, date) DO UPDATE SET reason = excluded.reason
+        """,
+        (barber_id, date, reason),
+    )
+    # A day off overrides whatever was already published for that date.
+    _set_availability_tx(conn, barber_id, date, [])
+
+
+def add_availability_exception(barber_id: str, date: str, reason: str = ""):
+    """Marks a date as a day off for the barber and clears its availability."""
+    run_write(_add_exception_tx, barber_id, date, reason)
+    cache.invalidate_availability(barber_id, date)
+
+
+def delete_availability_exception(barber_id: str, date: str):
+    run_write(
+        lambda conn: conn.execute(
+            "DELETE FROM availability_exceptions WHERE barber_id = ? AND date = ?",
             (barber_id, date),
         )
-        for time in times:
-            cursor.execute(
-                "INSERT INTO barber_availability (id, barber_id, date, time) VALUES (?, ?, ?, ?)",
-                (str(uuid.uuid4()), barber_id, date, time),
+    )
+
+
+def _apply_template_tx(
+    conn: sqlite3.Connection,
+    barber_id: str,
+    start: datetime.date,
+    end: datetime.date,
+) -> int:
+    template: list[set[str]] = [set() for _ in range(7)]
+    for row in conn.execute(
+        "SELECT weekday, time FROM availability_templates WHERE barber_id = ?",
+        (barber_id,),
+    ):
+        template[row["weekday"]].add(row["time"])
+    days_off = {
+        row["date"]
+        for row in conn.execute(
+            "SELECT date FROM availability_exceptions WHERE barber_id = ? AND date BETWEEN ? AND ?",
+            (barber_id, start.isoformat(), end.isoformat()),
+        )
+    }
+    touched = 0
+    day = start
+    while day <= end:
+        date_str = day.isoformat()
+        if date_str in days_off:
+            touched += _set_availability_tx(conn, barber_id, date_str, [])
+        elif template[day.weekday()]:
+            touched += _set_availability_tx(
+                conn, barber_id, date_str, list(template[day.weekday()])
             )
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        print(f"Database error: {e}")
-    finally:
-        conn.close()
+        day += datetime.timedelta(days=1)
+    return touched
+
+
+def apply_weekly_template(
+    barber_id: str, start_date: str, end_date: str
+) -> int:
+    """Expands the barber's weekly template over a date range.
+
+    Every day in the range whose weekday has template times gets exactly
+    those slots; days off listed in availability_exceptions are cleared
+    instead, and weekdays without a template are left untouched. The whole
+    range is written in one transaction. Returns the number of rows touched.
+    """
+    start = datetime.date.fromisoformat(start_date)
+    end = datetime.date.fromisoformat(end_date)
+    if end < start or (end - start).days >= MAX_TEMPLATE_RANGE_DAYS:
+        raise ValueError(f"Invalid template range: {start_date} to {end_date}")
+    touched = run_write(_apply_template_tx, barber_id, start, end)
+    if touched:
+        cache.invalidate_availability(barber_id)
+    return touched
+
 
-def get_all_available_dates() -> list[str]:
-    """Fetches all unique dates that have at least one availability slot."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT date FROM barber_availability")
-    rows = cursor.fetchall()
-    conn.close()
-    return [row["date"] for row in rows]
+def get_month_availability(barber_id: str, month: str) -> dict[str, int]:
+    """Offered slot masks by date for a barber over a 'YYYY-MM' month.
 
+    Booked slots are included; see get_month_slots for the free ones.
+    """
+    return _load_month_masks("barber_availability", barber_id, month)
 
-def delete_past_availability_db():
+
+def delete_past_availability_db() -> int:
     """Deletes barber availability records for dates that have already passed."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
     today_str = datetime.date.today().strftime("%Y-%m-%d")
     try:
-        cursor.execute(
-            "DELETE FROM barber_availability WHERE date < ?", (today_str,)
+        deleted = run_write(
+            lambda conn: conn.execute(
+                "DELETE FROM barber_availability WHERE date < ?", (today_str,)
+            ).rowcount
         )
-        conn.commit()
     except Exception as e:
         print(f"Database error in delete_past_availability_db: {e}")
-    finally:
-        conn.close()
+        return 0
+    if deleted:
+        cache.invalidate_availability()
+    return deleted
+
+
+def acquire_maintenance_lease(name: str, owner: str, ttl_seconds: float) -> bool:
+    """Claims the named lease for ttl_seconds if it is free or has expired.
+
+    Several backend workers can share one database file; only the worker that
+    wins the lease should run a given maintenance pass.
+    """
+    now = time.time()
+    return run_write(
+        lambda conn: conn.execute(
+            """
+            INSERT INTO maintenance_lease (name, owner, expires_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT (name) DO UPDATE
+            SET owner = excluded.owner, expires_at = excluded.expires_at
+            WHERE maintenance_lease.expires_at <= ?
+            """,
+            (name, owner, now + ttl_seconds, now),
+        ).rowcount == 1
+    )
+
+
+def optimize_db(vacuum_pages: int = 0):
+    """Refreshes query planner statistics and reclaims free pages.
+
+    vacuum_pages limits how many free pages are released; 0 releases all.
+    """
+    def _optimize(conn: sqlite3.Connection):
+        conn.execute("PRAGMA optimize")
+        conn.execute(f"PRAGMA incremental_vacuum({int(vacuum_pages)})").fetchall()
+
+    run_write(_optimize)
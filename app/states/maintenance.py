@@ -0,0 +1,63 @@
+"""Background database housekeeping that runs inside the backend process."""
+import asyncio
+import os
+import socket
+
+from app.states.cache import availability_cache, reference_cache
+from app.states.db_async import run_db
+from app.states.db_service import (
+    acquire_maintenance_lease,
+    archive_past_appointments_db,
+    delete_past_availability_db,
+    optimize_db,
+)
+
+MAINTENANCE_INTERVAL_SECONDS = int(
+    os.environ.get("MAINTENANCE_INTERVAL_SECONDS", "900")
+)
+# Free pages released per pass; 0 releases all of them.
+MAINTENANCE_VACUUM_PAGES = int(os.environ.get("MAINTENANCE_VACUUM_PAGES", "0"))
+
+_LEASE_NAME = "maintenance"
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_maintenance() -> bool:
+    """Runs one maintenance pass if this worker wins the lease.
+
+    The lease is held for a full interval, so when several workers share the
+    database only one of them does the work each interval.
+    """
+    if not acquire_maintenance_lease(
+        _LEASE_NAME, _worker_id(), MAINTENANCE_INTERVAL_SECONDS
+    ):
+        return False
+    archived_appointments = archive_past_appointments_db()
+    deleted_slots = delete_past_availability_db()
+    optimize_db(MAINTENANCE_VACUUM_PAGES)
+    print(
+        f"Maintenance: archived {archived_appointments} past appointments "
+        f"and removed {deleted_slots} past availability slots."
+    )
+    for label, stats in (
+        ("Reference", reference_cache.stats()),
+        ("Availability", availability_cache.stats()),
+    ):
+        print(
+            f"{label} cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate)."
+        )
+    return True
+
+
+async def maintenance_task():
+    """Lifespan task that runs maintenance every MAINTENANCE_INTERVAL_SECONDS."""
+    while True:
+        try:
+            await run_db(run_maintenance)
+        except Exception as e:
+            print(f"Maintenance error: {e}")
+        await asyncio.sleep(MAINTENANCE_INTERVAL_SECONDS)
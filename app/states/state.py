@@ -1,17 +1,23 @@
 import reflex as rx
 from typing import TypedDict, List, Optional
+import asyncio
 import datetime
 import calendar
 import uuid
-import random
 from app.states.db_service import (
+    APPOINTMENTS_PAGE_SIZE,
+    add_months,
+    days_mask,
+    month_key,
     Appointment,
+    AvailabilityException,
     Barber,
     Service,
-    get_all_appointments,
-    add_appointment_db,
+)
+from app.states.booking_state import SPANISH_MONTHS
+from app.states.db_async import (
+    get_appointments_page,
     delete_appointment_db,
-    get_appointment_by_code,
     get_all_barbers,
     add_barber_db,
     update_barber_db,
@@ -22,13 +28,57 @@ from app.states.db_service import (
     delete_service_db,
     get_availability_for_barber,
     set_availability_for_barber,
-    get_all_available_dates,
-    delete_past_availability_db,
+    get_month_availability,
+    get_weekly_template,
+    set_weekly_template_day,
+    apply_weekly_template,
+    get_availability_exceptions,
+    add_availability_exception,
+    delete_availability_exception,
+)
+
+
+WEEKDAY_NAMES = (
+    "Lunes",
+    "Martes",
+    "Miércoles",
+    "Jueves",
+    "Viernes",
+    "Sábado",
+    "Domingo",
 )
 
 
+class AppointmentCard(TypedDict):
+    """The fields of an appointment the admin list renders."""
+
+    id: str
+    customer: str
+    date: str
+    time: str
+    services: str
+    barber: str
+    phone: str
+
+
+def _appointment_card(appointment: Appointment) -> AppointmentCard:
+    return AppointmentCard(
+        id=appointment["id"],
+        customer=f"{appointment['name']} {appointment['last_name']}",
+        date=appointment["date"],
+        time=appointment["time"],
+        services=", ".join(appointment["services"]),
+        barber=appointment["barber"],
+        phone=appointment["phone"],
+    )
+
+
 class BarberState(rx.State):
-    appointments: list[Appointment] = []
+    # Appointments loaded so far in the admin list, in (date, time, id) order.
+    # Backend-only: the client gets the slimmer appointment_cards.
+    _appointments: list[Appointment] = []
+    appointment_cards: list[AppointmentCard] = []
+    has_more_appointments: bool = False
     barbers: list[Barber] = []
     services: list[Service] = []
     new_barber_name: str = ""
@@ -39,52 +89,9 @@ class BarberState(rx.State):
     editing_item_price: int = 0
     show_edit_barber_dialog: bool = False
     show_edit_service_dialog: bool = False
-    all_possible_times: list[str] = [
-        "09:00", "09:30", "10:00", "10:30", "11:00", "11:30", "12:00", "12:30", 
-        "14:00", "14:30", "15:00", "15:30", "16:00", "16:30", "17:00", "17:30",
-        "18:00", "18:30", "19:00", "19:30", "20:00", "20:30", "21:00", "21:30",
-        "22:00", "22:30", "23:00",
-    ]
     display_month_date: datetime.date = (
         datetime.date.today()
     )
-    selected_date: str = ""
-    selected_time: str = ""
-    selected_barber: str = ""
-    selected_services: list[str] = []
-    show_confirm_dialog: bool = False
-    pending_appointment_data: dict = {}
-    pending_booking_code: str = ""
-
-    # Appointment search state
-    show_search_dialog: bool = False
-    search_booking_code: str = ""
-    found_appointment: Optional[Appointment] = None
-    search_error_message: str = ""
-    show_cancel_alert: bool = False
-    spanish_months: list[str] = [
-        "Enero",
-        "Febrero",
-        "Marzo",
-        "Abril",
-        "Mayo",
-        "Junio",
-        "Julio",
-        "Agosto",
-        "Septiembre",
-        "Octubre",
-        "Noviembre",
-        "Diciembre",
-    ]
-    week_days: list[str] = [
-        "Lu",
-        "Ma",
-        "Mi",
-        "Ju",
-        "Vi",
-        "Sá",
-        "Do",
-    ]
     filter_name: str = ""
     filter_phone: str = ""
     filter_service: str = ""
@@ -95,58 +102,92 @@ class BarberState(rx.State):
     availability_selected_date: str = ""
     availability_selected_times: list[str] = []
     
-    # All dates with at least one available slot
-    globally_available_dates: list[str] = []
-
-    @rx.event
-    def load_data(self):
-        self._delete_past_appointments()
-        self._delete_past_availability()
-        self.appointments = get_all_appointments()
-        self.barbers = get_all_barbers()
-        self.services = get_all_services()
-        self.globally_available_dates = get_all_available_dates()
-        if self.barbers:
+    # Weekly template for the barber selected in the availability panel
+    template_weekday: str = "0"
+    template_times: list[str] = []
+    template_start_date: str = ""
+    template_end_date: str = ""
+    availability_exceptions: list[AvailabilityException] = []
+
+    # Days of the displayed month the availability panel's barber works
+    availability_days_mask: int = 0
+
+    @rx.event(background=True)
+    async def load_data(self):
+        # The queries run in parallel on the database thread pool, without
+        # holding this session's state lock while they wait on disk.
+        async with self:
+            filters = self._appointment_filters()
+            month = month_key(self.display_month_date)
+        (page, has_more), barbers, services = await asyncio.gather(
+            self._fetch_appointments_page(filters),
+            get_all_barbers(),
+            get_all_services(),
+        )
+        async with self:
+            self._set_appointments(page)
+            self.has_more_appointments = has_more
+            self.barbers = barbers
+            self.services = services
+            if not self.barbers:
+                return
             # Ensure a barber is selected for availability if not already
             if not self.availability_selected_barber_id:
                 self.availability_selected_barber_id = self.barbers[0]["id"]
-            # Load availability for the selected barber and date
-            if self.availability_selected_date:
-                self.availability_selected_times = get_availability_for_barber(
-                    self.availability_selected_barber_id, self.availability_selected_date
-                )
-
-    def _delete_past_appointments(self):
-        """Deletes appointments that are in the past."""
-        now = datetime.datetime.now()
-        appointments_to_check = get_all_appointments()
-        for app in appointments_to_check:
-            try:
-                app_datetime = datetime.datetime.strptime(
-                    f"{app['date']} {app['time']}", "%Y-%m-%d %H:%M"
-                )
-                if app_datetime < now:
-                    delete_appointment_db(app["id"])
-            except (ValueError, KeyError):
-                # Skip appointments with invalid date/time format or missing keys
-                continue
-    
-    def _delete_past_availability(self):
-        """Deletes barber availability for dates that have already passed."""
-        delete_past_availability_db()
-
-    def _generate_unique_booking_code(self) -> str:
-        """Generates a unique 4-digit booking code."""
-        existing_codes = {
-            app.get("booking_code") for app in self.appointments
+            barber_id = self.availability_selected_barber_id
+            date = self.availability_selected_date
+            weekday = int(self.template_weekday)
+        template, exceptions, barber_month = await asyncio.gather(
+            get_weekly_template(barber_id),
+            get_availability_exceptions(barber_id),
+            get_month_availability(barber_id, month),
+        )
+        # Load availability for the selected barber and date
+        times = await get_availability_for_barber(barber_id, date) if date else None
+        async with self:
+            self.template_times = template[weekday]
+            self.availability_exceptions = exceptions
+            self.availability_days_mask = days_mask(barber_month)
+            if times is not None:
+                self.availability_selected_times = times
+
+    def _appointment_filters(self) -> dict:
+        return {
+            "name": self.filter_name.strip(),
+            "phone": self.filter_phone.strip(),
+            "service": self.filter_service,
+            "date": self.filter_date,
         }
-        while True:
-            code = str(random.randint(1000, 9999))
-            if code not in existing_codes:
-                return code
+
+    @staticmethod
+    async def _fetch_appointments_page(
+        filters: dict, after: Optional[Appointment] = None
+    ) -> tuple[list[Appointment], bool]:
+        """Fetches the page after `after` and whether more pages follow."""
+        page = await get_appointments_page(
+            after, APPOINTMENTS_PAGE_SIZE + 1, **filters
+        )
+        return page[:APPOINTMENTS_PAGE_SIZE], len(page) > APPOINTMENTS_PAGE_SIZE
+
+    @rx.event
+    async def load_more_appointments(self):
+        after = self._appointments[-1] if self._appointments else None
+        page, self.has_more_appointments = await self._fetch_appointments_page(
+            self._appointment_filters(), after
+        )
+        self._appointments = self._appointments + page
+        self.appointment_cards = self.appointment_cards + [
+            _appointment_card(appointment) for appointment in page
+        ]
+
+    def _set_appointments(self, appointments: list[Appointment]):
+        self._appointments = appointments
+        self.appointment_cards = [
+            _appointment_card(appointment) for appointment in appointments
+        ]
 
     @rx.event
-    def add_barber(self, form_data: dict):
+    async def add_barber(self, form_data: dict):
         barber_name = form_data.get("name", "").strip()
         if not barber_name:
             return rx.toast(
@@ -156,13 +197,13 @@ class BarberState(rx.State):
         new_barber = Barber(
             id=str(uuid.uuid4()), name=barber_name
         )
-        add_barber_db(new_barber)
-        yield BarberState.load_data()
+        await add_barber_db(new_barber)
+        return BarberState.load_data
 
     @rx.event
-    def delete_barber(self, barber_id: str):
-        delete_barber_db(barber_id)
-        yield BarberState.load_data()
+    async def delete_barber(self, barber_id: str):
+        await delete_barber_db(barber_id)
+        return BarberState.load_data
 
     @rx.event
     def open_edit_barber_dialog(self, barber: Barber):
@@ -171,16 +212,16 @@ class BarberState(rx.State):
         self.show_edit_barber_dialog = True
 
     @rx.event
-    def save_barber_edit(self, form_data: dict):
+    async def save_barber_edit(self, form_data: dict):
         new_name = form_data.get("name", "").strip()
         if not new_name:
             return rx.toast(
                 "El nombre no puede estar vacío.",
                 duration=3000,
             )
-        update_barber_db(self.editing_item_id, new_name)
+        await update_barber_db(self.editing_item_id, new_name)
         self.show_edit_barber_dialog = False
-        yield BarberState.load_data()
+        return BarberState.load_data
 
     @rx.event
     def close_edit_dialogs(self):
@@ -191,7 +232,7 @@ class BarberState(rx.State):
         self.editing_item_price = 0
 
     @rx.event
-    def add_service(self, form_data: dict):
+    async def add_service(self, form_data: dict):
         service_name = form_data.get("name", "").strip()
         try:
             price_str = form_data.get("price", "0")
@@ -210,13 +251,17 @@ class BarberState(rx.State):
             name=service_name,
             price=service_price,
         )
-        add_service_db(new_service)
-        yield BarberState.load_data()
+        await add_service_db(new_service)
+        return BarberState.load_data
 
     @rx.event
-    def delete_service(self, service_id: str):
-        delete_service_db(service_id)
-        yield BarberState.load_data()
+    async def delete_service(self, service_id: str):
+        if not await delete_service_db(service_id):
+            return rx.toast(
+                "No se puede eliminar un servicio con citas agendadas.",
+                duration=3000,
+            )
+        return BarberState.load_data
 
     @rx.event
     def open_edit_service_dialog(self, service: Service):
@@ -226,7 +271,7 @@ class BarberState(rx.State):
         self.show_edit_service_dialog = True
 
     @rx.event
-    def save_service_edit(self, form_data: dict):
+    async def save_service_edit(self, form_data: dict):
         new_name = form_data.get("name", "").strip()
         try:
             price_str = form_data.get("price", "0")
@@ -238,204 +283,91 @@ class BarberState(rx.State):
                 "Por favor, ingrese un nombre y precio válidos para el servicio.",
                 duration=3000,
             )
-        update_service_db(
+        await update_service_db(
             self.editing_item_id, new_name, new_price
         )
         self.show_edit_service_dialog = False
-        yield BarberState.load_data()
-
-    @rx.event
-    def select_date(self, date_str: str):
-        self.selected_date = date_str
-        self.selected_time = ""
-        self.selected_barber = ""
-        self.selected_services = []
-
-    @rx.event
-    def select_barber(self, barber: str):
-        self.selected_barber = barber
-        self.selected_time = ""
+        return BarberState.load_data
 
-    @rx.event
-    def select_time(self, time_str: str):
-        self.selected_time = time_str
-
-    @rx.event
-    def toggle_service(self, service_name: str):
-        if service_name in self.selected_services:
-            self.selected_services.remove(service_name)
-        else:
-            self.selected_services.append(service_name)
-
-    @rx.event
-    def change_month(self, delta: int):
-        current_year, current_month = (
-            self.display_month_date.year,
-            self.display_month_date.month,
-        )
-        new_month = current_month + delta
-        new_year = current_year
-        if new_month > 12:
-            new_month = 1
-            new_year += 1
-        elif new_month < 1:
-            new_month = 12
-            new_year -= 1
-        self.display_month_date = (
-            self.display_month_date.replace(
-                year=new_year, month=new_month, day=1
+    async def _load_availability_days(self):
+        """Loads the days of the displayed month the selected barber works."""
+        if not self.availability_selected_barber_id:
+            self.availability_days_mask = 0
+            return
+        self.availability_days_mask = days_mask(
+            await get_month_availability(
+                self.availability_selected_barber_id,
+                month_key(self.display_month_date),
             )
         )
 
     @rx.event
-    def prepare_appointment(self, form_data: dict):
-        if not form_data.get("name") or not form_data.get("last_name") or not form_data.get("phone") or not self.selected_services:
-            return rx.toast(
-                "Por favor, complete todos los campos y seleccione al menos un servicio.",
-                duration=3000,
-            )
-        self.pending_appointment_data = form_data
-        self.pending_booking_code = self._generate_unique_booking_code()
-        self.show_confirm_dialog = True
+    async def change_month(self, delta: int):
+        self.display_month_date = add_months(self.display_month_date, delta)
+        await self._load_availability_days()
 
     @rx.event
-    def confirm_appointment(self):
-        if (
-            not self.selected_date
-            or not self.selected_time
-            or not self.selected_barber
-            or not self.selected_services
-        ):
-            return rx.toast(
-                "Error: faltan detalles de la cita.",
-                duration=3000,
-            )
-        new_appointment = Appointment(
-            id=str(uuid.uuid4()),
-            name=self.pending_appointment_data["name"],
-            last_name=self.pending_appointment_data["last_name"],
-            phone=self.pending_appointment_data["phone"],
-            date=self.selected_date,
-            time=self.selected_time,
-            services=self.selected_services,
-            barber=self.selected_barber,
-            booking_code=self.pending_booking_code,
+    async def delete_appointment(self, appointment_id: str):
+        await delete_appointment_db(appointment_id)
+        # Drop it from the loaded pages instead of reloading from page one.
+        self._set_appointments(
+            [app for app in self._appointments if app["id"] != appointment_id]
         )
-        add_appointment_db(new_appointment)
-        self.show_confirm_dialog = False
-        self.pending_appointment_data = {}
-        self.pending_booking_code = ""
-        self.selected_date = ""
-        self.selected_time = ""
-        self.selected_barber = ""
-        self.selected_services = []
-        yield BarberState.load_data()
-        return rx.toast(
-            "Cita agendada con éxito!", duration=3000
-        )
-
-    @rx.event
-    def cancel_confirmation(self):
-        self.show_confirm_dialog = False
-        self.pending_appointment_data = {}
-        self.pending_booking_code = ""
 
-    @rx.event
-    def delete_appointment(self, appointment_id: str):
-        delete_appointment_db(appointment_id)
-        yield BarberState.load_data()
+    async def _apply_filters(self):
+        """Reloads the appointment list from the first page with the current filters."""
+        page, self.has_more_appointments = await self._fetch_appointments_page(
+            self._appointment_filters()
+        )
+        self._set_appointments(page)
 
     @rx.event
-    def set_filter_name(self, name: str):
+    async def set_filter_name(self, name: str):
         self.filter_name = name
+        await self._apply_filters()
 
     @rx.event
-    def set_filter_phone(self, phone: str):
+    async def set_filter_phone(self, phone: str):
         self.filter_phone = phone
+        await self._apply_filters()
 
     @rx.event
-    def set_filter_service(self, service: str):
+    async def set_filter_service(self, service: str):
         self.filter_service = service
+        await self._apply_filters()
 
     @rx.event
-    def set_filter_date(self, date: str):
+    async def set_filter_date(self, date: str):
         self.filter_date = date
+        await self._apply_filters()
 
     @rx.event
-    def clear_filters(self):
+    async def clear_filters(self):
         self.filter_name = ""
         self.filter_phone = ""
         self.filter_service = ""
         self.filter_date = ""
-
-    # --- Appointment Search Events ---
-    @rx.event
-    def toggle_search_dialog(self):
-        self.show_search_dialog = not self.show_search_dialog
-        # Reset search state when opening
-        if self.show_search_dialog:
-            self.search_booking_code = ""
-            self.found_appointment = None
-            self.search_error_message = ""
-
-    @rx.event
-    def find_appointment(self, form_data: dict):
-        code = form_data.get("booking_code", "").strip()
-        if not code:
-            self.search_error_message = "Por favor, ingrese un código."
-            return
-        
-        appointment = get_appointment_by_code(code)
-        if appointment:
-            self.found_appointment = appointment
-            self.search_error_message = ""
-        else:
-            self.found_appointment = None
-            self.search_error_message = "No se encontró ninguna cita con ese código."
-
-    @rx.event
-    def close_search_dialog(self):
-        self.show_search_dialog = False
-        self.search_booking_code = ""
-        self.found_appointment = None
-        self.search_error_message = ""
-        self.show_cancel_alert = False
-
-    @rx.event
-    def cancel_found_appointment(self):
-        """Shows the confirmation dialog to cancel the appointment."""
-        self.show_cancel_alert = True
-
-    @rx.event
-    def confirm_cancellation(self):
-        """Cancels the appointment found via the search dialog after confirmation."""
-        if self.found_appointment:
-            delete_appointment_db(self.found_appointment["id"])
-            yield self.close_search_dialog()
-            yield BarberState.load_data()
-            return rx.toast("Cita cancelada con éxito.", duration=3000)
-
-    @rx.event
-    def toggle_cancel_alert(self):
-        self.show_cancel_alert = not self.show_cancel_alert
+        await self._apply_filters()
 
     # --- Availability Management Events ---
 
     @rx.event
-    def handle_availability_barber_change(self, barber_id: str):
+    async def handle_availability_barber_change(self, barber_id: str):
         self.availability_selected_barber_id = barber_id
         if self.availability_selected_date:
-            self.availability_selected_times = get_availability_for_barber(
+            self.availability_selected_times = await get_availability_for_barber(
                 barber_id, self.availability_selected_date
             )
         else:
             self.availability_selected_times = []
+        await self._load_template()
+        await self._load_availability_days()
 
     @rx.event
-    def handle_availability_date_change(self, date_str: str):
+    async def handle_availability_date_change(self, date_str: str):
         self.availability_selected_date = date_str
         if self.availability_selected_barber_id:
-            self.availability_selected_times = get_availability_for_barber(
+            self.availability_selected_times = await get_availability_for_barber(
                 self.availability_selected_barber_id, date_str
             )
 
@@ -448,115 +380,123 @@ class BarberState(rx.State):
             self.availability_selected_times.sort()
 
     @rx.event
-    def save_availability(self):
+    async def save_availability(self):
         if not self.availability_selected_barber_id or not self.availability_selected_date:
             return rx.toast("Seleccione un barbero y una fecha.", duration=3000)
         
-        set_availability_for_barber(
+        changed = await set_availability_for_barber(
             self.availability_selected_barber_id,
             self.availability_selected_date,
             self.availability_selected_times,
         )
-        # Refresh the globally available dates after saving
-        self.globally_available_dates = get_all_available_dates()
+        if not changed:
+            return rx.toast("No hay cambios en la disponibilidad.", duration=3000)
+        # Refresh the calendar after saving
+        await self._load_availability_days()
         return rx.toast("Disponibilidad guardada con éxito.", duration=3000)
 
-    # --- Computed Vars ---
+    # --- Weekly Template Events ---
 
-    @rx.var
-    def barber_names(self) -> list[str]:
-        return [barber["name"] for barber in self.barbers]
+    async def _load_template(self):
+        """Loads the template day and days off for the selected barber."""
+        barber_id = self.availability_selected_barber_id
+        if not barber_id:
+            self.template_times = []
+            self.availability_exceptions = []
+            return
+        template, self.availability_exceptions = await asyncio.gather(
+            get_weekly_template(barber_id),
+            get_availability_exceptions(barber_id),
+        )
+        self.template_times = template[int(self.template_weekday)]
 
-    @rx.var
-    def sorted_appointments(self) -> list[Appointment]:
-        if not self.appointments:
-            return []
-        return sorted(
-            self.appointments,
-            key=lambda app: (
-                datetime.datetime.strptime(
-                    app["date"], "%Y-%m-%d"
-                ).date(),
-                datetime.datetime.strptime(
-                    app["time"], "%H:%M"
-                ).time(),
-            ),
+    @rx.event
+    async def handle_template_weekday_change(self, weekday: str):
+        self.template_weekday = weekday
+        await self._load_template()
+
+    @rx.event
+    def toggle_template_time(self, time: str):
+        if time in self.template_times:
+            self.template_times.remove(time)
+        else:
+            self.template_times.append(time)
+            self.template_times.sort()
+
+    @rx.event
+    async def save_template_day(self):
+        if not self.availability_selected_barber_id:
+            return rx.toast("Seleccione un barbero.", duration=3000)
+        await set_weekly_template_day(
+            self.availability_selected_barber_id,
+            int(self.template_weekday),
+            self.template_times,
         )
+        return rx.toast("Plantilla guardada con éxito.", duration=3000)
 
-    @rx.var
-    def filtered_appointments(self) -> list[Appointment]:
-        appointments = self.sorted_appointments
-        if self.filter_name:
-            appointments = [
-                app
-                for app in appointments
-                if self.filter_name.lower() in app["name"].lower() or self.filter_name.lower() in app["last_name"].lower()
-            ]
-        if self.filter_phone:
-            appointments = [
-                app
-                for app in appointments
-                if self.filter_phone in app["phone"]
-            ]
-        if self.filter_service:
-            appointments = [
-                app
-                for app in appointments
-                if self.filter_service in app["services"]
-            ]
-        if self.filter_date:
-            appointments = [
-                app
-                for app in appointments
-                if app["date"] == self.filter_date
-            ]
-        return appointments
+    @rx.event
+    def set_template_start_date(self, date: str):
+        self.template_start_date = date
 
-    @rx.var
-    def display_month_str(self) -> str:
-        month_index = self.display_month_date.month - 1
-        return f"{self.spanish_months[month_index]} {self.display_month_date.year}"
+    @rx.event
+    def set_template_end_date(self, date: str):
+        self.template_end_date = date
 
-    @rx.var
-    def calendar_weeks(self) -> list[list[dict]]:
-        cal = calendar.Calendar(firstweekday=0)
-        month_days = cal.monthdayscalendar(
-            self.display_month_date.year,
-            self.display_month_date.month,
+    @rx.event
+    async def apply_template(self):
+        if (
+            not self.availability_selected_barber_id
+            or not self.template_start_date
+            or not self.template_end_date
+        ):
+            return rx.toast("Seleccione un barbero y un rango de fechas.", duration=3000)
+        try:
+            changed = await apply_weekly_template(
+                self.availability_selected_barber_id,
+                self.template_start_date,
+                self.template_end_date,
+            )
+        except ValueError:
+            return rx.toast("El rango de fechas no es válido.", duration=3000)
+        await self._load_availability_days()
+        if self.availability_selected_date:
+            self.availability_selected_times = await get_availability_for_barber(
+                self.availability_selected_barber_id, self.availability_selected_date
+            )
+        return rx.toast(
+            f"Plantilla aplicada: {changed} horarios actualizados.", duration=3000
         )
-        weeks = []
-        today = datetime.date.today()
-        for week in month_days:
-            week_data = []
-            for day in week:
-                if day == 0:
-                    week_data.append({"is_in_month": False})
-                    continue
-                date_obj = datetime.date(
-                    self.display_month_date.year,
-                    self.display_month_date.month,
-                    day,
-                )
-                date_str = date_obj.strftime("%Y-%m-%d")
-                
-                # A day is disabled if it's in the past OR if it's not in the list of globally available dates.
-                is_past = date_obj <= today
-                is_available = date_str in self.globally_available_dates
-                is_disabled = is_past or not is_available
 
-                week_data.append(
-                    {
-                        "day": day,
-                        "is_in_month": True,
-                        "is_today": date_obj == today,
-                        "is_selected": date_str
-                        == self.selected_date,
-                        "date_str": date_str,
-                        "is_disabled": is_disabled,
-                    }
-                )
-            weeks.append(week_data)
-        return weeks
+    @rx.event
+    async def add_exception(self, form_data: dict):
+        date = form_data.get("date", "")
+        if not self.availability_selected_barber_id or not date:
+            return rx.toast("Seleccione un barbero y una fecha.", duration=3000)
+        await add_availability_exception(
+            self.availability_selected_barber_id,
+            date,
+            form_data.get("reason", "").strip(),
+        )
+        self.availability_exceptions = await get_availability_exceptions(
+            self.availability_selected_barber_id
+        )
+        await self._load_availability_days()
+        if date == self.availability_selected_date:
+            self.availability_selected_times = []
+
+    @rx.event
+    async def delete_exception(self, date: str):
+        await delete_availability_exception(self.availability_selected_barber_id, date)
+        self.availability_exceptions = await get_availability_exceptions(
+            self.availability_selected_barber_id
+        )
+
+    # --- Computed Vars ---
+
+    @rx.var
+    def display_month_str(self) -> str:
+        month_index = self.display_month_date.month - 1
+        return f"{SPANISH_MONTHS[month_index]} {self.display_month_date.year}"
 
     @rx.var
     def admin_calendar_weeks(self) -> list[list[dict]]:
@@ -584,107 +524,19 @@ class BarberState(rx.State):
                 # For the admin panel, a day is only disabled if it's in the past.
                 is_disabled = date_obj < today
 
+                # The selected day is compared in the component, so picking
+                # a day does not resend the whole month.
                 week_data.append(
                     {
                         "day": day,
                         "is_in_month": True,
                         "is_today": date_obj == today,
-                        "is_selected": date_str == self.availability_selected_date,
+                        "has_availability": bool(
+                            self.availability_days_mask >> (day - 1) & 1
+                        ),
                         "date_str": date_str,
                         "is_disabled": is_disabled,
                     }
                 )
             weeks.append(week_data)
         return weeks
-
-    @rx.var
-    def available_times_for_selected_date_and_barber(
-        self,
-    ) -> list[str]:
-        if not self.selected_date or not self.selected_barber:
-            return []
-
-        # Find the barber's ID from their name
-        barber_id = None
-        for b in self.barbers:
-            if b["name"] == self.selected_barber:
-                barber_id = b["id"]
-                break
-        if not barber_id:
-            return []
-
-        try:
-            selected_date_obj = datetime.datetime.strptime(
-                self.selected_date, "%Y-%m-%d"
-            ).date()
-        except ValueError:
-            return []
-
-        # 1. Get explicitly available times from the database
-        available_times = get_availability_for_barber(barber_id, self.selected_date)
-        
-        # 2. Get times that are already booked
-        booked_times = {
-            app["time"]
-            for app in self.appointments
-            if app["date"] == self.selected_date
-            and app["barber"] == self.selected_barber
-        }
-
-        # 3. Filter out booked times
-        final_times = [t for t in available_times if t not in booked_times]
-
-        # 4. If it's today, filter out past times
-        if selected_date_obj == datetime.date.today():
-            now = datetime.datetime.now().time()
-            final_times = [
-                t
-                for t in final_times
-                if datetime.datetime.strptime(t, "%H:%M").time() > now
-            ]
-        
-        return final_times
-
-    @rx.var
-    def morning_times(self) -> list[str]:
-        """Devuelve los horarios de la mañana disponibles."""
-        return [
-            t for t in self.available_times_for_selected_date_and_barber
-            if int(t.split(":")[0]) < 12
-        ]
-
-    @rx.var
-    def afternoon_times(self) -> list[str]:
-        """Devuelve los horarios de la tarde disponibles."""
-        return [
-            t for t in self.available_times_for_selected_date_and_barber
-            if int(t.split(":")[0]) >= 12
-        ]
-
-    @rx.var
-    def selected_services_details(self) -> list[Service]:
-        """Devuelve los detalles de los servicios seleccionados."""
-        return [
-            s for s in self.services if s["name"] in self.selected_services
-        ]
-
-    @rx.var
-    def total_price(self) -> int:
-        """Calcula el precio total de los servicios seleccionados."""
-        return sum(s["price"] for s in self.selected_services_details)
-
-    @rx.var
-    def found_appointment_services_details(self) -> list[Service]:
-        """Devuelve los detalles de los servicios para la cita encontrada."""
-        if not self.found_appointment:
-            return []
-        return [
-            s
-            for s in self.services
-            if s["name"] in self.found_appointment["services"]
-        ]
-
-    @rx.var
-    def found_appointment_total_price(self) -> int:
-        """Calcula el precio total para la cita encontrada."""
-        return sum(s["price"] for s in self.found_appointment_services_details)
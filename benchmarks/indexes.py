@@ -0,0 +1,132 @@
+"""Before/after latency of the managed secondary indexes.
+
+Builds scratch databases of 1k, 10k and 100k rows with the app's own
+schema, times the hot access paths with every managed index in place,
+drops the indexes and times them again. Prints the mean latency in
+microseconds per query, before -> after:
+
+    python benchmarks/indexes.py
+
+Nothing touches app/states/app.db.
+"""
+import datetime
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.states import db_service  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000)
+BARBERS = 50
+HOURS = 12
+BASE_DATE = datetime.date(2026, 1, 1)
+
+
+def build(rows: int) -> sqlite3.Connection:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    db_service.migrate(conn)
+    conn.execute("BEGIN")
+    conn.execute("INSERT INTO services (id, name, price) VALUES ('s1', 'Corte', 10)")
+    appointments = []
+    for i in range(rows):
+        # Unique (barber, date, time), as idx_appointments_slot requires
+        slot = i // BARBERS
+        date = (BASE_DATE + datetime.timedelta(days=slot // HOURS)).isoformat()
+        hour = f"{9 + slot % HOURS:02d}:00"
+        appointments.append(
+            (
+                str(uuid.uuid4()), "Nombre", "Apellido", "5550000",
+                date, hour, db_service.slot_minute(date, hour),
+                f"B{i % BARBERS}", f"C{i:07d}",
+            )
+        )
+    conn.executemany(
+        "INSERT INTO appointments (id, name, last_name, phone, date, time, start_minute, barber, booking_code) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        appointments,
+    )
+    conn.executemany(
+        "INSERT INTO appointment_services (appointment_id, service_id, price) VALUES (?, 's1', 10)",
+        [(a[0],) for a in appointments],
+    )
+    conn.executemany(
+        "INSERT INTO barber_availability (id, barber_id, date, time) VALUES (?, ?, ?, '09:00')",
+        [
+            (
+                str(uuid.uuid4()),
+                f"b{i % BARBERS}",
+                (BASE_DATE + datetime.timedelta(days=i // BARBERS)).isoformat(),
+            )
+            for i in range(rows)
+        ],
+    )
+    conn.execute("COMMIT")
+    return conn
+
+
+def drop_indexes(conn: sqlite3.Connection):
+    for name in {**db_service.MANAGED_INDEXES, **db_service.MANAGED_UNIQUE_INDEXES}:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def mean_us(query, repeat: int = 200) -> float:
+    query()  # Warm the page cache
+    start = time.perf_counter()
+    for _ in range(repeat):
+        query()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def measure(conn: sqlite3.Connection, rows: int) -> list[float]:
+    code = f"C{rows // 2:07d}"
+    appointment_id = conn.execute(
+        "SELECT id FROM appointments WHERE booking_code = ?", (code,)
+    ).fetchone()[0]
+    cutoff = (BASE_DATE + datetime.timedelta(days=1)).isoformat()
+    return [
+        mean_us(
+            lambda: conn.execute(
+                db_service._APPOINTMENT_SELECT
+                + " WHERE a.booking_code = ? AND a.booking_code <> ''",
+                (code,),
+            ).fetchone()
+        ),
+        mean_us(
+            lambda: conn.execute(
+                "SELECT service_id, price FROM appointment_services WHERE appointment_id = ?",
+                (appointment_id,),
+            ).fetchall()
+        ),
+        mean_us(
+            lambda: conn.execute(
+                "SELECT COUNT(*) FROM barber_availability WHERE date < ?", (cutoff,)
+            ).fetchone()
+        ),
+        mean_us(
+            lambda: conn.execute("SELECT DISTINCT date FROM barber_availability").fetchall(),
+            20,
+        ),
+    ]
+
+
+def main():
+    columns = ("by_code", "services join", "date < ? scan", "distinct dates")
+    print(f"{'rows':<8}" + "".join(f"{c:<22}" for c in columns))
+    for rows in SIZES:
+        conn = build(rows)
+        after = measure(conn, rows)
+        drop_indexes(conn)
+        before = measure(conn, rows)
+        conn.close()
+        cells = "".join(f"{f'{b:.0f} -> {a:.0f}':<22}" for b, a in zip(before, after))
+        print(f"{rows // 1000}k".ljust(8) + cells)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import os
+import tempfile
+
+import pytest
+
+# The connection pool is process-wide, so every test shares one scratch
+# database; point it away from app/states/app.db before anything connects.
+os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(), "test.db")
+
+from app.states import db_service  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def db():
+    db_service.init_db()
+    return db_service
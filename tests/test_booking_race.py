@@ -0,0 +1,128 @@
+import multiprocessing
+import sqlite3
+import threading
+import uuid
+
+import pytest
+
+from app.states.db_service import BOOKING_OK, BOOKING_SLOT_TAKEN
+
+# Simultaneous confirmations racing for the same slot
+RACERS = 300
+# Worker processes racing for one slot, each with its own writer thread
+PROCESSES = 8
+
+
+def _appointment(db, barber: str, date: str, time: str, i: int):
+    return db.Appointment(
+        id=str(uuid.uuid4()),
+        name=f"Customer {i}",
+        last_name="Race",
+        phone=str(i),
+        date=date,
+        time=time,
+        services=["Race Cut"],
+        service_prices=[],
+        barber=barber,
+        booking_code="",
+    )
+
+
+def _stored(db, barber: str, date: str, time: str) -> int:
+    with db.get_db_connection() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM appointments WHERE barber = ? AND date = ? AND time = ?",
+            (barber, date, time),
+        ).fetchone()[0]
+
+
+@pytest.fixture(scope="module")
+def race_barber(db):
+    db.add_barber_db(db.Barber(id="race-barber", name="Race Barber"))
+    db.add_service_db(db.Service(id="race-service", name="Race Cut", price=10))
+    return "Race Barber"
+
+
+def test_one_booking_wins_a_contested_slot(db, race_barber):
+    db.set_availability_for_barber("race-barber", "2030-01-02", ["10:00"])
+
+    results = []
+    results_lock = threading.Lock()
+    start = threading.Barrier(RACERS)
+
+    def confirm(i: int):
+        appointment = _appointment(db, race_barber, "2030-01-02", "10:00", i)
+        start.wait()
+        result, _ = db.add_appointment_db(appointment)
+        with results_lock:
+            results.append(result)
+
+    threads = [threading.Thread(target=confirm, args=(i,)) for i in range(RACERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(BOOKING_OK) == 1
+    assert results.count(BOOKING_SLOT_TAKEN) == RACERS - 1
+    assert _stored(db, race_barber, "2030-01-02", "10:00") == 1
+    assert db.get_open_times("race-barber", "2030-01-02") == []
+
+
+def _confirm_in_process(start, results, i: int):
+    from app.states import db_service
+
+    appointment = _appointment(db_service, "Race Barber", "2030-01-03", "10:00", i)
+    start.wait()
+    results.put(db_service.add_appointment_db(appointment)[0])
+
+
+def test_one_booking_wins_across_processes(db, race_barber):
+    # Separate processes share only the database file, as workers do.
+    db.set_availability_for_barber("race-barber", "2030-01-03", ["10:00"])
+    context = multiprocessing.get_context("spawn")
+    start = context.Barrier(PROCESSES)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_confirm_in_process, args=(start, results, i))
+        for i in range(PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get(timeout=60) for _ in processes]
+    for process in processes:
+        process.join()
+
+    assert outcomes.count(BOOKING_OK) == 1
+    assert outcomes.count(BOOKING_SLOT_TAKEN) == PROCESSES - 1
+    assert _stored(db, race_barber, "2030-01-03", "10:00") == 1
+
+
+def test_slot_index_rejects_a_booking_that_skips_the_check(db, race_barber):
+    db.set_availability_for_barber("race-barber", "2030-01-04", ["10:00"])
+    # A write on its own connection, bypassing the writer and free_slots
+    with db.get_db_connection() as conn:
+        conn.execute(
+            "INSERT INTO appointments (id, name, last_name, phone, date, time, start_minute, barber, booking_code) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ("rogue-1", "R", "R", "1", "2030-01-04", "10:00",
+             db.slot_minute("2030-01-04", "10:00"), race_barber, ""),
+        )
+        conn.commit()
+        with pytest.raises(sqlite3.IntegrityError, match="appointments.barber"):
+            conn.execute(
+                "INSERT INTO appointments (id, name, last_name, phone, date, time, start_minute, barber, booking_code) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ("rogue-2", "R", "R", "1", "2030-01-04", "10:00",
+                 db.slot_minute("2030-01-04", "10:00"), race_barber, ""),
+            )
+        conn.rollback()
+        # Offer the booked slot again, so the pre-check passes.
+        conn.execute(
+            "INSERT INTO free_slots (barber_id, date, time) VALUES ('race-barber', '2030-01-04', '10:00')"
+        )
+        conn.commit()
+
+    result, _ = db.add_appointment_db(
+        _appointment(db, race_barber, "2030-01-04", "10:00", 0)
+    )
+    assert result == BOOKING_SLOT_TAKEN
+    assert _stored(db, race_barber, "2030-01-04", "10:00") == 1
@@ -0,0 +1,29 @@
+import asyncio
+import threading
+
+from app.states import db_async
+
+
+def test_slow_query_does_not_stall_other_sessions(db, monkeypatch):
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_services():
+        started.set()
+        # Stands in for a query stuck on slow disk I/O.
+        release.wait(5)
+        return []
+
+    monkeypatch.setattr(db_async, "get_all_services", db_async._offload(slow_services))
+
+    async def main():
+        slow = asyncio.create_task(db_async.get_all_services())
+        await asyncio.to_thread(started.wait, 5)
+        # Another session's query completes while the slow one is in flight.
+        barbers = await asyncio.wait_for(db_async.get_all_barbers(), timeout=2)
+        assert isinstance(barbers, list)
+        assert not slow.done()
+        release.set()
+        assert await slow == []
+
+    asyncio.run(main())
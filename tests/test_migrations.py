@@ -0,0 +1,47 @@
+import sqlite3
+
+# The tables as they were before PRAGMA user_version was tracked
+LEGACY_SCHEMA = """
+CREATE TABLE barbers (id TEXT PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE services (id TEXT PRIMARY KEY, name TEXT NOT NULL UNIQUE, price INTEGER NOT NULL);
+CREATE TABLE appointments (
+    id TEXT PRIMARY KEY, name TEXT, last_name TEXT, phone TEXT,
+    date TEXT, time TEXT, barber TEXT, booking_code TEXT
+);
+CREATE TABLE appointment_services (
+    id TEXT PRIMARY KEY, appointment_id TEXT NOT NULL, service_name TEXT NOT NULL
+);
+CREATE TABLE barber_availability (id TEXT PRIMARY KEY, barber_id TEXT, date TEXT, time TEXT);
+"""
+
+
+def test_double_bookings_are_moved_aside_on_upgrade(db, tmp_path):
+    conn = sqlite3.connect(tmp_path / "legacy.db", isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(LEGACY_SCHEMA)
+    conn.execute("INSERT INTO barbers VALUES ('b1', 'Ana')")
+    conn.execute("INSERT INTO services VALUES ('s1', 'Corte', 10)")
+    conn.execute("INSERT INTO barber_availability VALUES ('a', 'b1', '2030-03-04', '09:00')")
+    for i in range(3):
+        conn.execute(
+            "INSERT INTO appointments VALUES (?, 'N', 'L', '1', '2030-03-04', '09:00', 'Ana', ?)",
+            (f"appt{i}", f"CODE{i}"),
+        )
+        conn.execute(
+            "INSERT INTO appointment_services VALUES (?, ?, 'Corte')", (f"item{i}", f"appt{i}")
+        )
+
+    db.migrate(conn)
+
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == db.SCHEMA_VERSION
+    assert [row[0] for row in conn.execute("SELECT id FROM appointments")] == ["appt0"]
+    assert [tuple(row) for row in conn.execute(
+        "SELECT appointment_id, kept_appointment_id, services FROM appointment_conflicts ORDER BY id"
+    )] == [
+        ("appt1", "appt0", '[["Corte",10]]'),
+        ("appt2", "appt0", '[["Corte",10]]'),
+    ]
+    assert conn.execute("SELECT COUNT(*) FROM free_slots").fetchone()[0] == 0
+    assert conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'idx_appointments_slot'"
+    ).fetchone()